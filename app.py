@@ -1,25 +1,154 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, session, Response as HTTPResponse, stream_with_context, make_response, abort, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
+import re
+import csv
+import io
+import json
+import zlib
+import base64
+import queue
+import threading
+import time
+import atexit
+import hashlib
+import tempfile
+import shutil
+import heapq
+from collections import Counter, OrderedDict, namedtuple
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
 from datetime import datetime
+from datetime import timezone
+import click
 import PyPDF2
+try:
+    import numpy as np
+except ImportError:  # only the columnar analytics snapshots need it
+    np = None
 from werkzeug.utils import secure_filename
+from markupsafe import Markup, escape
+from sqlalchemy.exc import IntegrityError
 from flask_migrate import Migrate
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///forms.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///forms.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'uploads'
+
+# Database engine profile
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 10))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+# PDF extraction jobs: worker processes, and how many queued/running jobs one
+# user may have. Jobs still queued/running after PDF_JOB_STALE_SECONDS (e.g.
+# orphaned by a restart) no longer count and are reported as failed.
+app.config['PDF_WORKERS'] = int(os.environ.get('PDF_WORKERS', 2))
+app.config['PDF_JOBS_PER_USER'] = int(os.environ.get('PDF_JOBS_PER_USER', 2))
+app.config['PDF_JOB_STALE_SECONDS'] = int(os.environ.get('PDF_JOB_STALE_SECONDS', 600))
+
+# Forms with more responses than this are deleted by a background worker
+app.config['BACKGROUND_DELETE_THRESHOLD'] = int(os.environ.get('BACKGROUND_DELETE_THRESHOLD', 50000))
+
+# Number of rendered public form pages and compiled submission validators kept per process
+app.config['RENDER_CACHE_SIZE'] = int(os.environ.get('RENDER_CACHE_SIZE', 256))
+app.config['VALIDATOR_CACHE_SIZE'] = int(os.environ.get('VALIDATOR_CACHE_SIZE', 1024))
+
+# Hourly response rollups older than this are dropped by `flask compact-rollups`;
+# daily rollups are kept forever
+app.config['ROLLUP_HOURLY_RETENTION_DAYS'] = int(os.environ.get('ROLLUP_HOURLY_RETENTION_DAYS', 90))
+
+# Referral codes are served from a per-process map; each worker re-checks the
+# shared map version at most this often. Clicks are written in batches.
+app.config['REFERRAL_MAP_CHECK_SECONDS'] = float(os.environ.get('REFERRAL_MAP_CHECK_SECONDS', 5))
+app.config['REFERRAL_CLICK_FLUSH_SECONDS'] = float(os.environ.get('REFERRAL_CLICK_FLUSH_SECONDS', 10))
+
+# Request instrumentation. /metrics is open unless METRICS_TOKEN is set, in which
+# case scrapers must send it as a bearer token. Requests slower than
+# SLOW_REQUEST_MS (0 = off) are logged with their SLOW_REQUEST_TOP_SQL slowest queries.
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 0))
+app.config['SLOW_REQUEST_TOP_SQL'] = int(os.environ.get('SLOW_REQUEST_TOP_SQL', 5))
+
+# Logged-in users kept per process by load_user, and how long an entry may be
+# served before it is re-read (bounds staleness across worker processes)
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 4096))
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 300))
+app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'uploads')
+# Columnar per-form response snapshots read by the statistics API (needs numpy)
+app.config['SNAPSHOT_FOLDER'] = os.environ.get('SNAPSHOT_FOLDER', 'snapshots')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
+# Submission ingest: 'sync' writes each submission in the request, 'queued'
+# hands it to a background writer that commits in batches.
+app.config['INGEST_MODE'] = os.environ.get('INGEST_MODE', 'sync')
+app.config['INGEST_QUEUE_SIZE'] = int(os.environ.get('INGEST_QUEUE_SIZE', 10000))
+app.config['INGEST_BATCH_SIZE'] = int(os.environ.get('INGEST_BATCH_SIZE', 500))
+app.config['INGEST_FLUSH_MS'] = int(os.environ.get('INGEST_FLUSH_MS', 50))
+# 'commit': the request waits until its batch is committed; 'enqueue': it returns
+# as soon as the submission is queued (faster, but queued rows are lost on a crash)
+app.config['INGEST_DURABILITY'] = os.environ.get('INGEST_DURABILITY', 'commit')
+
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+def normalize_database_url(url):
+    # Hosting providers hand out postgres:// URLs, which SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def build_engine_options(config):
+    url = config['SQLALCHEMY_DATABASE_URI']
+    if url.startswith('sqlite'):
+        if ':memory:' in url or url in ('sqlite://', 'sqlite:///'):
+            return {}  # in-memory databases use a single static connection
+        return {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+        }
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
+app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
+
 db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+def include_migration_name(name, type_, parent_names):
+    # The FTS5 search table and its shadow tables are managed outside the models
+    return not (type_ == 'table' and name.startswith('response_search'))
+
+migrate = Migrate(app, db, include_name=include_migration_name)
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}")
+    cursor.execute(f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']:d}")
+    cursor.execute(f"PRAGMA cache_size=-{app.config['SQLITE_CACHE_SIZE_KB']:d}")  # negative = KiB
+    cursor.execute(f"PRAGMA mmap_size={app.config['SQLITE_MMAP_SIZE']:d}")
+    cursor.close()
+
+with app.app_context():
+    if db.engine.dialect.name == 'sqlite':
+        db.event.listen(db.engine, 'connect', apply_sqlite_pragmas)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -50,9 +179,14 @@ class Form(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', name='fk_form_user'), nullable=False)
     company_id = db.Column(db.Integer, db.ForeignKey('company.id', name='fk_form_company'), nullable=True)
-    questions = db.relationship('Question', backref='form', lazy=True, cascade='all, delete-orphan')
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # bumped on any edit to the form or its questions
+    questions = db.relationship('Question', backref='form', lazy=True, order_by='Question.order', cascade='all, delete-orphan')
     responses = db.relationship('Response', backref='form', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('ix_form_user_created', 'user_id', 'created_at'),
+    )
+
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False)
@@ -61,19 +195,42 @@ class Question(db.Model):
     options = db.Column(db.Text)  # JSON string for multiple choice/checkbox options
     required = db.Column(db.Boolean, default=False)
     order = db.Column(db.Integer, nullable=False)
+    option_rows = db.relationship('QuestionOption', backref='question', lazy=True,
+                                  order_by='QuestionOption.position', cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_question_form_order', 'form_id', 'order'),
+    )
 
     def get_options(self):
-        import json
         if self.options:
             try:
                 return json.loads(self.options)
-            except:
+            except ValueError:
                 return []
         return []
 
     def set_options(self, options):
-        import json
+        options = list(options)
         self.options = json.dumps(options)
+        # Update rows in place (rather than replace the collection) so positions stay unique mid-flush
+        rows = self.option_rows
+        for position, label in enumerate(options):
+            if position < len(rows):
+                rows[position].label = label
+            else:
+                rows.append(QuestionOption(position=position, label=label))
+        del rows[len(options):]
+
+class QuestionOption(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    label = db.Column(db.String(500), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('question_id', 'position', name='uq_question_option_position'),
+    )
 
 class Response(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -83,11 +240,61 @@ class Response(db.Model):
     answers = db.relationship('Answer', backref='response', lazy=True, cascade='all, delete-orphan')
     company = db.relationship('Company', backref='responses')
 
+    __table_args__ = (
+        db.Index('ix_response_form_submitted', 'form_id', 'submitted_at', 'id'),
+    )
+
 class Answer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     response_id = db.Column(db.Integer, db.ForeignKey('response.id'), nullable=False)
     question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
-    answer_text = db.Column(db.Text, nullable=False)
+    answer_text = db.Column(db.Text)  # free text; NULL when a typed column below holds the answer
+    option_index = db.Column(db.SmallInteger)  # radio/multiple_choice: position in the question's options
+    option_mask = db.Column(db.BigInteger)  # checkbox: bit n set when option n was selected
+    numeric_value = db.Column(db.Float)  # scale/number/range
+
+class SubmissionKey(db.Model):
+    # Client idempotency keys from the batch API, so replayed submissions are not stored twice
+    id = db.Column(db.Integer, primary_key=True)
+    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False)
+    key = db.Column(db.String(100), nullable=False)
+    response_id = db.Column(db.Integer, db.ForeignKey('response.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('form_id', 'key', name='uq_submission_key'),
+    )
+
+CHOICE_QUESTION_TYPES = ('multiple_choice', 'radio', 'checkbox')
+NUMERIC_QUESTION_TYPES = ('scale', 'number', 'range')
+RENDERED_QUESTION_TYPES = ('text', 'email', 'multiple_choice', 'checkbox', 'radio')  # inputs in view_form.html
+OPTION_MASK_BITS = 63  # checkbox options past this position are stored as text
+
+class AnswerTally(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    company_id = db.Column(db.Integer, nullable=False, default=0)  # 0 = no company; not a FK so it can be part of the unique key
+    option = db.Column(db.String(500), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('question_id', 'company_id', 'option', name='uq_answer_tally'),
+        db.Index('ix_answer_tally_form', 'form_id'),
+    )
+
+class ResponseRollup(db.Model):
+    # Responses per form, company and UTC time bucket, kept in step by write_submissions
+    id = db.Column(db.Integer, primary_key=True)
+    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=False)
+    company_id = db.Column(db.Integer, nullable=False, default=0)  # 0 = no company
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket = db.Column(db.DateTime, nullable=False)  # start of the bucket
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('form_id', 'granularity', 'bucket', 'company_id', name='uq_response_rollup'),
+    )
 
 class PDFUpload(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -96,12 +303,378 @@ class PDFUpload(db.Model):
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=True)
+    blob_id = db.Column(db.Integer, db.ForeignKey('pdf_blob.id', name='fk_pdf_upload_blob'), nullable=True)  # NULL for uploads stored before dedup
     user = db.relationship('User', backref='pdf_uploads')
     form = db.relationship('Form', backref='pdf_upload')
+    blob = db.relationship('PDFBlob')
+
+class PDFBlob(db.Model):
+    # One row per distinct uploaded file, stored under uploads/ by its SHA-256
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    path = db.Column(db.String(255), nullable=False)  # relative to UPLOAD_FOLDER
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # PDFUpload rows pointing here
+    extracted_questions = db.Column(db.Text)  # JSON cache of extract_questions_from_pdf, NULL until parsed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ExtractionJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    pdf_upload_id = db.Column(db.Integer, db.ForeignKey('pdf_upload.id'), nullable=True)  # NULL once a failed job's upload is discarded
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=True)  # referral captured at upload time
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    error = db.Column(db.Text)
+    form_id = db.Column(db.Integer, db.ForeignKey('form.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    pdf_upload = db.relationship('PDFUpload')
+
+    __table_args__ = (
+        db.Index('ix_extraction_job_user_status', 'user_id', 'status'),
+    )
+
+class CacheVersion(db.Model):
+    # Shared version counters for per-process caches of small tables
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class ReferralClick(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'day', name='uq_referral_click_day'),
+    )
+
+class RenderCache:
+    # Small thread-safe LRU of rendered pages. Keys carry the form version, so a
+    # stale entry can never be served; invalidate() just frees the memory early.
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, form_id):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == form_id]:
+                del self.entries[key]
+
+render_cache = RenderCache(app.config['RENDER_CACHE_SIZE'])
+validator_cache = RenderCache(app.config['VALIDATOR_CACHE_SIZE'])  # same keying: (form_id, version)
+
+@db.event.listens_for(db.session, 'before_flush')
+def bump_changed_form_versions(session, flush_context, instances):
+    changed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Question) and obj.form_id is not None:
+            changed.add(obj.form_id)
+        elif isinstance(obj, Form) and obj in session.dirty:
+            changed.add(obj.id)
+    for form_id in changed:
+        form = session.get(Form, form_id)
+        if form is not None and form not in session.deleted:
+            form.version = Form.version + 1
+    session.info.setdefault('changed_form_ids', set()).update(changed)
+
+def bump_form_version(form_id):
+    # For bulk statements that bypass the ORM flush hooks
+    db.session.execute(db.update(Form).where(Form.id == form_id).values(version=Form.version + 1))
+    db.session.info.setdefault('changed_form_ids', set()).add(form_id)
+
+@db.event.listens_for(db.session, 'after_commit')
+def invalidate_changed_forms(session):
+    for form_id in session.info.pop('changed_form_ids', ()):
+        render_cache.invalidate(form_id)
+        validator_cache.invalidate(form_id)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def forget_changed_forms(session):
+    session.info.pop('changed_form_ids', None)
+
+class SessionUser:
+    # What load_user hands to Flask-Login: the identity fields routes read from
+    # current_user, without an ORM instance bound to the request's session.
+    __slots__ = ('id', 'email')
+
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, email):
+        self.id = id
+        self.email = email
+
+    def get_id(self):
+        return str(self.id)
+
+    def __eq__(self, other):
+        if hasattr(other, 'get_id'):
+            return self.get_id() == other.get_id()
+        return NotImplemented
+
+    __hash__ = object.__hash__
+
+class UserCache:
+    # Thread-safe LRU of SessionUser records with a TTL. Local writes evict the
+    # entry on commit; the TTL covers writes made by other processes.
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, record):
+        with self.lock:
+            self.entries[record.id] = (time.monotonic() + self.ttl, record)
+            self.entries.move_to_end(record.id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+user_cache = UserCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+
+@db.event.listens_for(db.session, 'after_flush')
+def collect_changed_users(session, flush_context):
+    # Password changes, email changes and account deletions all go through here
+    changed = {obj.id for obj in session.dirty
+               if isinstance(obj, User) and session.is_modified(obj)}
+    changed.update(obj.id for obj in session.deleted if isinstance(obj, User))
+    if changed:
+        session.info.setdefault('changed_user_ids', set()).update(changed)
+
+@db.event.listens_for(db.session, 'after_commit')
+def invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+@db.event.listens_for(db.session, 'after_rollback')
+def forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
+
+@app.template_filter('fromjson')
+def from_json(value):
+    return json.loads(value)
+
+@app.template_filter('datetime')
+def format_datetime(value, fmt='%Y-%m-%d %H:%M:%S'):
+    if value is None:
+        return 'N/A'
+    return value.strftime(fmt)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    record = user_cache.get(user_id)
+    if record is None:
+        row = db.session.execute(
+            db.select(User.id, User.email).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        record = SessionUser(row.id, row.email)
+        user_cache.put(record)
+    return record
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        cumulative = 0
+        for bound, n in zip(self.bounds, self.counts):
+            cumulative += n
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.total}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+class RequestMetrics:
+    # Per-process request and SQL statistics, rendered in the Prometheus text
+    # format. Each worker process reports its own series; scrape every worker.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = Counter()  # (endpoint, method, status) -> n
+        self.latency = {}  # (endpoint, method) -> Histogram of seconds
+        self.queries = {}  # (endpoint, method) -> Histogram of queries per request
+        self.query_seconds = Counter()  # (endpoint, method) -> seconds spent in SQL
+
+    def record(self, endpoint, method, status, seconds, query_count, query_seconds):
+        key = (endpoint, method)
+        with self.lock:
+            self.requests[(endpoint, method, status)] += 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.queries.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(query_count)
+            self.query_seconds[key] += query_seconds
+
+    def render(self):
+        lines = []
+        with self.lock:
+            lines.append('# HELP http_requests_total Requests handled, by endpoint, method and status.')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), n in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {n}')
+            lines.append('# HELP http_request_duration_seconds Request latency, including streamed bodies.')
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for (endpoint, method), histogram in sorted(self.latency.items()):
+                lines.extend(histogram.render('http_request_duration_seconds', f'endpoint="{endpoint}",method="{method}"'))
+            lines.append('# HELP db_queries_per_request SQL statements executed per request.')
+            lines.append('# TYPE db_queries_per_request histogram')
+            for (endpoint, method), histogram in sorted(self.queries.items()):
+                lines.extend(histogram.render('db_queries_per_request', f'endpoint="{endpoint}",method="{method}"'))
+            lines.append('# HELP db_query_seconds_total Time spent executing SQL during requests.')
+            lines.append('# TYPE db_query_seconds_total counter')
+            for (endpoint, method), seconds in sorted(self.query_seconds.items()):
+                lines.append(f'db_query_seconds_total{{endpoint="{endpoint}",method="{method}"}} {seconds}')
+        stats = user_cache.stats()
+        lines.append('# HELP user_cache_lookups_total load_user cache lookups, by result.')
+        lines.append('# TYPE user_cache_lookups_total counter')
+        lines.append(f'user_cache_lookups_total{{result="hit"}} {stats["hits"]}')
+        lines.append(f'user_cache_lookups_total{{result="miss"}} {stats["misses"]}')
+        lines.append('# HELP user_cache_entries Users currently held by the load_user cache.')
+        lines.append('# TYPE user_cache_entries gauge')
+        lines.append(f'user_cache_entries {stats["size"]}')
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics()
+
+# The start time lives on the execution context, which is discarded with the statement;
+# after_cursor_execute does not fire for a statement that raises
+def track_query_start(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_start_time = time.perf_counter()
+
+def track_query_end(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'query_start_time', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    # Queries run by background threads (ingest, deletes, click flushes) have no request
+    if not has_request_context() or 'request_stats' not in g:
+        return
+    stats = g.request_stats
+    stats['query_count'] += 1
+    stats['query_seconds'] += elapsed
+    if app.config['SLOW_REQUEST_MS']:
+        # Bounded min-heap of the slowest statements; the counter breaks ties
+        entry = (elapsed, stats['query_count'], statement)
+        if len(stats['slowest']) < app.config['SLOW_REQUEST_TOP_SQL']:
+            heapq.heappush(stats['slowest'], entry)
+        else:
+            heapq.heappushpop(stats['slowest'], entry)
+
+with app.app_context():
+    db.event.listen(db.engine, 'before_cursor_execute', track_query_start)
+    db.event.listen(db.engine, 'after_cursor_execute', track_query_end)
+
+@app.before_request
+def start_request_stats():
+    g.request_stats = {'started': time.perf_counter(), 'query_count': 0,
+                       'query_seconds': 0.0, 'slowest': []}
+
+def finish_request_stats(stats, endpoint, method, path, status):
+    seconds = time.perf_counter() - stats['started']
+    request_metrics.record(endpoint, method, status, seconds,
+                           stats['query_count'], stats['query_seconds'])
+    slow_ms = app.config['SLOW_REQUEST_MS']
+    if slow_ms and seconds * 1000 >= slow_ms:
+        top_sql = ''.join(
+            f'\n  {elapsed * 1000:8.1f} ms  {" ".join(statement.split())[:500]}'
+            for elapsed, _, statement in sorted(stats['slowest'], reverse=True)
+        )
+        app.logger.warning('Slow request %s %s -> %s in %.0f ms: %d queries, %.0f ms in SQL%s',
+                           method, path, status, seconds * 1000, stats['query_count'],
+                           stats['query_seconds'] * 1000, top_sql)
+
+@app.after_request
+def record_request_stats(response):
+    stats = g.get('request_stats')
+    if stats is not None:
+        stats['responded'] = True
+        # Recorded when the body is closed so streamed exports count in full
+        endpoint, method, path = request.endpoint or 'unmatched', request.method, request.path
+        response.call_on_close(lambda: finish_request_stats(
+            stats, endpoint, method, path, response.status_code))
+    return response
+
+@app.teardown_request
+def record_failed_request_stats(exc):
+    # after_request is skipped when a view raises
+    stats = g.get('request_stats')
+    if stats is not None and not stats.get('responded'):
+        stats['responded'] = True
+        finish_request_stats(stats, request.endpoint or 'unmatched', request.method, request.path, 500)
+
+@app.route('/metrics')
+def metrics():
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+    return HTTPResponse(request_metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # Routes
 @app.route('/')
@@ -140,11 +713,42 @@ def signup():
         return redirect(url_for('dashboard'))
     return render_template('signup.html')
 
+DASHBOARD_PAGE_SIZE = 24
+
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    forms = Form.query.filter_by(user_id=current_user.id).all()
-    return render_template('dashboard.html', forms=forms)
+    page = max(request.args.get('page', 1, type=int), 1)
+    search = request.args.get('q', '').strip()
+    
+    filters = [Form.user_id == current_user.id]
+    if search:
+        filters.append(Form.title.ilike(f'%{search}%'))
+    total = db.session.scalar(db.select(db.func.count(Form.id)).where(*filters))
+    
+    # One query: forms with their company plus per-form aggregates. The correlated
+    # subqueries only run for the forms on this page and are served by indexes.
+    response_count = (db.select(db.func.count(Response.id))
+                      .where(Response.form_id == Form.id).correlate(Form).scalar_subquery())
+    last_submitted_at = (db.select(db.func.max(Response.submitted_at))
+                         .where(Response.form_id == Form.id).correlate(Form).scalar_subquery())
+    question_count = (db.select(db.func.count(Question.id))
+                      .where(Question.form_id == Form.id).correlate(Form).scalar_subquery())
+    rows = db.session.execute(
+        db.select(Form,
+                  response_count.label('response_count'),
+                  last_submitted_at.label('last_submitted_at'),
+                  question_count.label('question_count'))
+        .options(db.joinedload(Form.company))
+        .where(*filters)
+        .order_by(Form.created_at.desc(), Form.id.desc())
+        .limit(DASHBOARD_PAGE_SIZE)
+        .offset((page - 1) * DASHBOARD_PAGE_SIZE)
+    ).all()
+    
+    page_count = max((total + DASHBOARD_PAGE_SIZE - 1) // DASHBOARD_PAGE_SIZE, 1)
+    return render_template('dashboard.html', rows=rows, page=page, page_count=page_count,
+                           total=total, search=search)
 
 @app.route('/create_form', methods=['GET', 'POST'])
 @login_required
@@ -171,8 +775,28 @@ def create_form():
 
 @app.route('/form/<int:form_id>')
 def view_form(form_id):
-    form = Form.query.get_or_404(form_id)
-    return render_template('view_form.html', form=form)
+    version = db.session.scalar(db.select(Form.version).where(Form.id == form_id))
+    if version is None:
+        abort(404)
+    if session.get('_flashes'):
+        # Pending flash messages make this render specific to one visitor
+        return render_template('view_form.html', form=db.session.get(Form, form_id),
+                               question_options=question_labels(form_id))
+
+    key = (form_id, version, current_user.is_authenticated)
+    entry = render_cache.get(key)
+    if entry is None:
+        html = render_template('view_form.html', form=db.session.get(Form, form_id),
+                               question_options=question_labels(form_id))
+        etag = f'{form_id}-{version}-' + hashlib.sha1(html.encode('utf-8')).hexdigest()[:16]
+        entry = (html, etag)
+        render_cache.put(key, entry)
+
+    html, etag = entry
+    response = make_response(html)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # always revalidate, answered with 304 when unchanged
+    return response.make_conditional(request)
 
 @app.route('/form/<int:form_id>/edit')
 @login_required
@@ -180,7 +804,223 @@ def edit_form(form_id):
     form = Form.query.get_or_404(form_id)
     if form.user_id != current_user.id:
         return redirect(url_for('dashboard'))
-    return render_template('edit_form.html', form=form)
+    return render_template('edit_form.html', form=form, question_options=question_labels(form_id))
+
+QUESTION_FIELDS = ('question_text', 'question_type', 'options', 'required', 'order')
+
+def normalize_question_payload(data, index):
+    options = data.get('options')
+    if isinstance(options, list):
+        options = json.dumps([str(option) for option in options])
+    elif options is not None and not isinstance(options, str):
+        raise ValueError(f'Question {index}: options must be a list or a string')
+    question_text = (data.get('question_text') or '').strip()
+    question_type = data.get('question_type') or 'text'
+    if len(question_type) > 20:
+        raise ValueError(f'Question {index}: unknown question type')
+    return {
+        'id': int(data['id']) if data.get('id') else None,
+        'question_text': question_text,
+        'question_type': question_type,
+        'options': options or None,
+        'required': bool(data.get('required')),
+        'order': int(data.get('order', index))
+    }
+
+def option_labels(options):
+    try:
+        labels = json.loads(options) if options else []
+    except ValueError:
+        return []  # scale/matrix settings are not option lists
+    return labels if isinstance(labels, list) else []
+
+def option_positions(labels):
+    positions = {}
+    for index, label in enumerate(labels):
+        positions.setdefault(label, index)
+    return positions
+
+def format_numeric(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def encode_answer(question_type, positions, values):
+    # values: the submitted strings; positions: {option label: index} for choice questions.
+    # Falls back to answer_text whenever the typed form could not be decoded losslessly.
+    row = {'answer_text': None, 'option_index': None, 'option_mask': None, 'numeric_value': None}
+    if question_type == 'checkbox':
+        indexes = [positions.get(value) for value in values]
+        if None not in indexes and len(set(indexes)) == len(indexes) and max(indexes) < OPTION_MASK_BITS:
+            row['option_mask'] = sum(1 << index for index in indexes)
+        else:
+            row['answer_text'] = ', '.join(values)
+        return row
+    value = values[0]
+    if question_type in CHOICE_QUESTION_TYPES and value in positions:
+        row['option_index'] = positions[value]
+    elif (question_type in NUMERIC_QUESTION_TYPES and re.fullmatch(r'-?\d+(\.\d+)?', value)
+          and format_numeric(float(value)) == value):
+        row['numeric_value'] = float(value)
+    else:
+        row['answer_text'] = value
+    return row
+
+def answer_values(labels, answer_text, option_index, option_mask, numeric_value):
+    # Inverse of encode_answer: the stored answer as a list of strings
+    if option_index is not None:
+        return [labels[option_index]] if option_index < len(labels) else []
+    if option_mask is not None:
+        return [label for index, label in enumerate(labels[:OPTION_MASK_BITS]) if option_mask >> index & 1]
+    if numeric_value is not None:
+        return [format_numeric(numeric_value)]
+    return [answer_text] if answer_text is not None else []
+
+def decode_answer(labels, answer_text, option_index, option_mask, numeric_value):
+    return ', '.join(answer_values(labels, answer_text, option_index, option_mask, numeric_value))
+
+def question_labels(form_id=None):
+    # {question_id: [option labels]} from the indexed question_option rows, for one
+    # form or every form; questions without options are absent
+    query = (db.select(QuestionOption.question_id, QuestionOption.label)
+             .order_by(QuestionOption.question_id, QuestionOption.position))
+    if form_id is not None:
+        query = query.join(Question, QuestionOption.question_id == Question.id).where(Question.form_id == form_id)
+    labels = {}
+    for question_id, label in db.session.execute(query):
+        labels.setdefault(question_id, []).append(label)
+    return labels
+
+def answer_encoding(question_type):
+    if question_type == 'checkbox':
+        return 'mask'
+    if question_type in CHOICE_QUESTION_TYPES:
+        return 'index'
+    if question_type in NUMERIC_QUESTION_TYPES:
+        return 'numeric'
+    return 'text'
+
+def reencode_answers(question_id, old_type, old_labels, new_type, new_labels):
+    # Typed answers point at option positions, so a question whose options were
+    # reordered or removed (or whose type changed) has its answers rewritten
+    encoding = answer_encoding(new_type)
+    if encoding == answer_encoding(old_type) and (
+            encoding not in ('index', 'mask') or new_labels[:len(old_labels)] == old_labels):
+        return  # unchanged, or options only appended: every stored position still means the same
+    positions = option_positions(new_labels)
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Answer.id, Answer.answer_text, Answer.option_index, Answer.option_mask, Answer.numeric_value)
+            .where(Answer.question_id == question_id, Answer.id > last_id)
+            .order_by(Answer.id).limit(EXPORT_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        changed = []
+        for answer_id, *stored in rows:
+            values = answer_values(old_labels, *stored)
+            if not values:
+                continue
+            if new_type != 'checkbox':
+                values = [', '.join(values)]
+            row = encode_answer(new_type, positions, values)
+            if tuple(row.values()) != tuple(stored):
+                changed.append({'id': answer_id, **row})
+        if changed:
+            db.session.execute(db.update(Answer), changed)
+
+@app.route('/form/<int:form_id>/update', methods=['POST'])
+@login_required
+def update_form(form_id):
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        return jsonify({'error': 'forbidden'}), 403
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        incoming = [normalize_question_payload(q, i) for i, q in enumerate(payload.get('questions', []))]
+    except (TypeError, ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Diff against the stored rows, loaded once as plain tuples
+    existing = {
+        row.id: row for row in db.session.execute(
+            db.select(Question.id, *[getattr(Question, field) for field in QUESTION_FIELDS])
+            .where(Question.form_id == form_id)
+        )
+    }
+    inserts, updates, options_changed, reencode = [], [], [], []
+    for question in incoming:
+        current = existing.get(question['id'])
+        if current is None:
+            inserts.append(question)
+            continue
+        changes = {field: question[field] for field in QUESTION_FIELDS if getattr(current, field) != question[field]}
+        if changes:
+            updates.append({'id': question['id'], **changes})
+            if 'options' in changes or 'question_type' in changes:
+                options_changed.append(question)
+                reencode.append((current, question))
+    kept_ids = {q['id'] for q in incoming}
+    deleted_ids = [question_id for question_id in existing if question_id not in kept_ids]
+
+    if not (inserts or updates or deleted_ids):
+        return jsonify({'inserted': 0, 'updated': 0, 'deleted': 0})
+
+    try:
+        # Responses whose search text changes: they answered a deleted or re-encoded question
+        reindex_ids = []
+        if search_index_enabled() and (deleted_ids or reencode):
+            reindex_ids = db.session.scalars(
+                db.select(Answer.response_id).distinct()
+                .where(Answer.question_id.in_(deleted_ids + [q['id'] for _, q in reencode]))
+                .order_by(Answer.response_id)
+            ).all()
+        if deleted_ids:
+            for model in (Answer, AnswerTally, QuestionOption):
+                db.session.execute(db.delete(model).where(model.question_id.in_(deleted_ids)))
+            db.session.execute(db.delete(Question).where(Question.id.in_(deleted_ids)))
+        if updates:
+            db.session.execute(db.update(Question), updates)
+        stored_labels = question_labels(form_id) if reencode else {}
+        for current, question in reencode:
+            reencode_answers(question['id'], current.question_type, stored_labels.get(question['id'], []),
+                             question['question_type'], option_labels(question['options']))
+        if inserts:
+            new_ids = db.session.scalars(
+                db.insert(Question).returning(Question.id, sort_by_parameter_order=True),
+                [{'form_id': form_id, **{field: q[field] for field in QUESTION_FIELDS}} for q in inserts]
+            ).all()
+            for question, new_id in zip(inserts, new_ids):
+                question['id'] = new_id
+
+        # Keep question_option in step for questions whose options were created or changed
+        changed_ids = [q['id'] for q in options_changed]
+        if changed_ids:
+            db.session.execute(db.delete(QuestionOption).where(QuestionOption.question_id.in_(changed_ids)))
+        option_rows = [
+            {'question_id': q['id'], 'position': position, 'label': label}
+            for q in options_changed + inserts
+            for position, label in enumerate(option_labels(q['options']))
+        ]
+        if option_rows:
+            db.session.execute(db.insert(QuestionOption), option_rows)
+
+        # A question that changed type is recounted from its re-encoded answers; one that
+        # is no longer a choice question recounts to nothing, which drops its tallies
+        retyped_ids = [q['id'] for current, q in reencode if current.question_type != q['question_type']]
+        if retyped_ids:
+            db.session.execute(db.delete(AnswerTally).where(AnswerTally.question_id.in_(retyped_ids)))
+            bump_tallies(count_raw_answers(form_id, retyped_ids))
+        reindex_responses(form_id, reindex_ids)
+
+        bump_form_version(form_id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Error saving form: {str(e)}'}), 500
+
+    return jsonify({'inserted': len(inserts), 'updated': len(updates), 'deleted': len(deleted_ids)})
 
 @app.route('/logout')
 @login_required
@@ -188,40 +1028,266 @@ def logout():
     logout_user()
     return redirect(url_for('index'))
 
+CompiledQuestion = namedtuple('CompiledQuestion', 'id field text question_type options positions required multiple')
+
+class FormValidator:
+    # A form's questions compiled for one form version: everything needed to
+    # check a submission and map it to answer rows, without ORM objects.
+    __slots__ = ('form_id', 'version', 'company_id', 'questions', 'by_id')
+
+    def __init__(self, form_id, version, company_id, questions):
+        self.form_id = form_id
+        self.version = version
+        self.company_id = company_id
+        self.questions = tuple(questions)
+        self.by_id = MappingProxyType({str(question.id): question for question in self.questions})
+
+    def check(self, getlist):
+        # getlist(field) -> submitted strings. Returns (answers, selected options, answer
+        # texts, errors) with errors as (question, message) pairs.
+        answers, selected, texts, errors = [], [], [], []
+        for question in self.questions:
+            values = [value for value in getlist(question.field) if value]
+            if not values:
+                if question.required:
+                    errors.append((question, 'is required'))
+                continue
+            if len(values) > 1 and not question.multiple:
+                errors.append((question, 'takes a single answer'))
+                continue
+            if question.options is not None:
+                unknown = [value for value in values if value not in question.options]
+                if unknown:
+                    errors.append((question, f'has no option {unknown[0]!r}'))
+                    continue
+                selected.append((question.id, values))
+            answers.append({'question_id': question.id,
+                            **encode_answer(question.question_type, question.positions, values)})
+            texts.append(', '.join(values))
+        return answers, selected, texts, errors
+
+def compile_form_validator(form_id, version, company_id):
+    questions = []
+    form_labels = question_labels(form_id)
+    for question_id, text, question_type, required in db.session.execute(
+        db.select(Question.id, Question.question_text, Question.question_type, Question.required)
+        .where(Question.form_id == form_id).order_by(Question.order)
+    ):
+        allowed, positions = None, MappingProxyType({})
+        # The public page has no input for other types, nor for choices without options,
+        # so those can never be required or limited to a set of options
+        answerable = question_type in RENDERED_QUESTION_TYPES
+        if question_type in CHOICE_QUESTION_TYPES:
+            labels = form_labels.get(question_id, [])
+            answerable = answerable and bool(labels)
+            if labels:
+                allowed = frozenset(labels)
+                positions = MappingProxyType(option_positions(labels))
+        questions.append(CompiledQuestion(question_id, f'question_{question_id}', text, question_type,
+                                          allowed, positions, bool(required) and answerable,
+                                          question_type == 'checkbox'))
+    return FormValidator(form_id, version, company_id, questions)
+
+def get_form_validator(form_id):
+    # One primary-key read per call; the questions are only read when the form version changes
+    row = db.session.execute(db.select(Form.version, Form.company_id).where(Form.id == form_id)).first()
+    if row is None:
+        return None
+    key = (form_id, row.version)
+    validator = validator_cache.get(key)
+    if validator is None:
+        validator = compile_form_validator(form_id, row.version, row.company_id)
+        validator_cache.put(key, validator)
+    return validator
+
+def build_submission(validator, getlist, company_id):
+    # Validate and map posted answers without touching the DB; returns (submission, errors)
+    answers, selected, texts, errors = validator.check(getlist)
+    if errors:
+        return None, errors
+    increments = Counter()
+    for question_id, options in selected:
+        for option in options:
+            increments[(validator.form_id, question_id, company_id or 0, option)] += 1
+    return {
+        'form_id': validator.form_id,
+        'company_id': company_id,
+        'submitted_at': datetime.utcnow(),
+        'answers': answers,
+        'increments': increments,
+        'search_text': '\n'.join(texts)
+    }, []
+
+def write_submissions(submissions):
+    # Insert a batch of submissions into the current transaction; the caller commits
+    responses = [
+        Response(form_id=s['form_id'], company_id=s['company_id'], submitted_at=s['submitted_at'])
+        for s in submissions
+    ]
+    db.session.add_all(responses)
+    db.session.flush()
+
+    answer_rows = [
+        {'response_id': response.id, **answer}
+        for response, s in zip(responses, submissions)
+        for answer in s['answers']
+    ]
+    if answer_rows:
+        db.session.execute(db.insert(Answer), answer_rows)
+
+    # Tallies and rollups are bumped in the same transaction as the rows they count
+    increments = Counter()
+    for s in submissions:
+        increments.update(s['increments'])
+    bump_tallies(increments)
+    bump_rollups(rollup_increments(
+        (s['form_id'], s['company_id'], s['submitted_at']) for s in submissions
+    ))
+    index_responses([
+        (response.id, s['form_id'], s['company_id'], s['search_text'])
+        for response, s in zip(responses, submissions)
+    ])
+    return responses
+
+class SubmissionIngestor:
+    # Write-behind queue: request threads enqueue validated submissions and a
+    # single writer thread commits them in multi-row transactions.
+
+    def __init__(self, app, max_size, batch_size, flush_ms, durability):
+        self.app = app
+        self.queue = queue.Queue(maxsize=max_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        self.durability = durability
+        self.claim_lock = threading.Lock()  # guards ticket['state']
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='submission-ingest', daemon=True)
+        self.thread.start()
+
+    def submit(self, submission, timeout=30):
+        # Returns False when the queue is full so the caller can push back
+        ticket = {'submission': submission, 'done': threading.Event(), 'error': None, 'state': 'queued'}
+        try:
+            self.queue.put_nowait(ticket)
+        except queue.Full:
+            return False
+        if self.durability == 'commit':
+            if not ticket['done'].wait(timeout):
+                with self.claim_lock:
+                    abandoned = ticket['state'] == 'queued'
+                    if abandoned:
+                        ticket['state'] = 'abandoned'  # the writer skips it
+                if abandoned:
+                    raise RuntimeError('Timed out waiting for the submission to be saved; it was not saved')
+                ticket['done'].wait()  # already being written: report how that ends
+            if ticket['error'] is not None:
+                raise ticket['error']
+        return True
+
+    def _claim(self, ticket):
+        with self.claim_lock:
+            if ticket['state'] == 'abandoned':
+                return False
+            ticket['state'] = 'writing'
+            return True
+
+    def _next_batch(self):
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        # With 'commit' durability callers are blocked on this batch, so flush as soon as
+        # the queue is drained (group commit); otherwise linger up to INGEST_FLUSH_MS
+        linger = self.flush_interval if self.durability == 'enqueue' else 0
+        deadline = time.monotonic() + linger
+        while len(batch) < self.batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self.stopping.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        batch = [ticket for ticket in batch if self._claim(ticket)]
+        if not batch:
+            return
+        with self.app.app_context():
+            try:
+                write_submissions([ticket['submission'] for ticket in batch])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # Retry one by one so a single bad submission does not sink the batch
+                for ticket in batch:
+                    try:
+                        write_submissions([ticket['submission']])
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        ticket['error'] = e
+                        self.app.logger.exception('Dropped submission for form %s', ticket['submission']['form_id'])
+            finally:
+                db.session.remove()
+        for ticket in batch:
+            ticket['done'].set()
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+def get_ingestor():
+    # Started lazily so CLI commands and migrations never spawn the writer thread
+    global _ingestor
+    if app.config['INGEST_MODE'] != 'queued':
+        return None
+    with _ingestor_lock:
+        if _ingestor is None:
+            _ingestor = SubmissionIngestor(
+                app,
+                max_size=app.config['INGEST_QUEUE_SIZE'],
+                batch_size=app.config['INGEST_BATCH_SIZE'],
+                flush_ms=app.config['INGEST_FLUSH_MS'],
+                durability=app.config['INGEST_DURABILITY']
+            )
+            atexit.register(_ingestor.stop)
+    return _ingestor
+
 @app.route('/form/<int:form_id>/submit', methods=['POST'])
 def submit_form(form_id):
-    form = Form.query.get_or_404(form_id)
+    validator = get_form_validator(form_id)
+    if validator is None:
+        abort(404)
     
     try:
         # Get company ID from form or session
-        company_id = form.company_id or session.get('referral_company_id')
+        company_id = validator.company_id or session.get('referral_company_id')
+        submission, errors = build_submission(validator, request.form.getlist, company_id)
+        if errors:
+            for question, message in errors:
+                flash(f'"{question.text}" {message}')
+            return redirect(url_for('view_form', form_id=form_id))
         
-        # Create response
-        response = Response(
-            form_id=form_id,
-            company_id=company_id
-        )
-        db.session.add(response)
-        db.session.commit()
-        
-        # Process answers
-        for question in form.questions:
-            if question.question_type == 'checkbox':
-                # Handle multiple checkbox selections
-                answer_texts = request.form.getlist(f'question_{question.id}')
-                answer_text = ', '.join(answer_texts) if answer_texts else None
-            else:
-                answer_text = request.form.get(f'question_{question.id}')
-                
-            if answer_text:
-                answer = Answer(
-                    response_id=response.id,
-                    question_id=question.id,
-                    answer_text=answer_text
-                )
-                db.session.add(answer)
+        ingestor = get_ingestor()
+        if ingestor is None:
+            write_submissions([submission])
+            db.session.commit()
+        elif not ingestor.submit(submission):
+            flash('We are receiving a lot of submissions right now. Your answers were not saved, please try again in a moment.')
+            return redirect(url_for('view_form', form_id=form_id))
         
-        db.session.commit()
         flash('Form submitted successfully!')
         return redirect(url_for('view_form', form_id=form_id))
     except Exception as e:
@@ -229,6 +1295,376 @@ def submit_form(form_id):
         flash(f'Error submitting form: {str(e)}')
         return redirect(url_for('view_form', form_id=form_id))
 
+BATCH_MAX_ITEMS = 5000
+BATCH_CHUNK_SIZE = 500
+SUBMITTED_AT_MAX_SKEW = timedelta(minutes=5)
+
+def read_batch_items():
+    # A JSON array (or {"submissions": [...]}), or NDJSON with one submission per line
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        items = []
+        for line_number, line in enumerate(request.stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f'line {line_number} is not valid JSON')
+            if len(items) > BATCH_MAX_ITEMS:
+                break
+        return items
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('submissions')
+    if not isinstance(payload, list):
+        raise ValueError('expected a JSON array of submissions')
+    return payload
+
+def parse_batch_item(validator, item):
+    # Returns (idempotency key, submission, errors)
+    if not isinstance(item, dict):
+        return None, None, ['submission must be a JSON object']
+    errors = []
+    key = item.get('idempotency_key')
+    if key is not None and not (isinstance(key, str) and 0 < len(key) <= 100):
+        errors.append('idempotency_key must be a string of 1 to 100 characters')
+        key = None
+
+    answers = item.get('answers')
+    if not isinstance(answers, dict):
+        return key, None, errors + ['answers must be an object keyed by question id']
+    values = {}
+    for question_id, value in answers.items():
+        question = validator.by_id.get(str(question_id))
+        if question is None:
+            errors.append(f'question {question_id} is not part of this form')
+            continue
+        values[question.field] = [str(v) for v in (value if isinstance(value, list) else [value])
+                                  if v is not None]
+
+    company_id = validator.company_id
+    if item.get('referral_code') is not None and company_id is None:
+        company_id = referral_resolver.resolve(str(item['referral_code']))
+        if company_id is None:
+            errors.append('unknown referral_code')
+
+    submitted_at = None
+    if item.get('submitted_at') is not None:
+        try:
+            submitted_at = parse_utc(str(item['submitted_at']))
+        except ValueError:
+            errors.append('submitted_at must be an ISO 8601 timestamp')
+        else:
+            if submitted_at > datetime.utcnow() + SUBMITTED_AT_MAX_SKEW:
+                errors.append('submitted_at is in the future')
+
+    submission, answer_errors = build_submission(validator, lambda field: values.get(field, []), company_id)
+    errors.extend(f'question {question.id} {message}' for question, message in answer_errors)
+    if errors:
+        return key, None, errors
+    if submitted_at is not None:
+        # Offline collectors report when the answers were given, not when they were synced
+        submission['submitted_at'] = submitted_at
+    return key, submission, []
+
+def write_batch_chunk(form_id, chunk, results):
+    # chunk: [(index, key, submission)]; commits once and fills results[index]
+    keys = {key for _, key, _ in chunk if key}
+    existing = {}
+    if keys:
+        existing = dict(db.session.execute(
+            db.select(SubmissionKey.key, SubmissionKey.response_id)
+            .where(SubmissionKey.form_id == form_id, SubmissionKey.key.in_(keys))
+        ).all())
+    fresh, repeats = [], []
+    claimed = set()
+    for index, key, submission in chunk:
+        if key in existing:
+            results[index] = {'index': index, 'status': 'duplicate', 'response_id': existing[key]}
+        elif key in claimed:
+            repeats.append((index, key))  # same key twice in this chunk
+        else:
+            fresh.append((index, key, submission))
+            if key:
+                claimed.add(key)
+
+    responses = write_submissions([submission for _, _, submission in fresh])
+    created = {}
+    key_rows = []
+    for (index, key, _), response in zip(fresh, responses):
+        results[index] = {'index': index, 'status': 'created', 'response_id': response.id}
+        if key:
+            created[key] = response.id
+            key_rows.append({'form_id': form_id, 'key': key, 'response_id': response.id})
+    if key_rows:
+        db.session.execute(db.insert(SubmissionKey), key_rows)
+    db.session.commit()
+    for index, key in repeats:
+        results[index] = {'index': index, 'status': 'duplicate', 'response_id': created[key]}
+
+@app.route('/api/forms/<int:form_id>/responses:batch', methods=['POST'])
+def api_submit_batch(form_id):
+    validator = get_form_validator(form_id)
+    if validator is None:
+        abort(404)
+    try:
+        items = read_batch_items()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'at most {BATCH_MAX_ITEMS} submissions per request'}), 413
+
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        key, submission, errors = parse_batch_item(validator, item)
+        if errors:
+            results[index] = {'index': index, 'status': 'invalid', 'errors': errors}
+        else:
+            valid.append((index, key, submission))
+
+    for start in range(0, len(valid), BATCH_CHUNK_SIZE):
+        chunk = valid[start:start + BATCH_CHUNK_SIZE]
+        try:
+            write_batch_chunk(form_id, chunk, results)
+        except IntegrityError:
+            # A concurrent replay claimed one of the keys first; retry against the committed keys
+            db.session.rollback()
+            write_batch_chunk(form_id, chunk, results)
+
+    statuses = Counter(result['status'] for result in results)
+    return jsonify({
+        'created': statuses['created'],
+        'duplicates': statuses['duplicate'],
+        'invalid': statuses['invalid'],
+        'results': results,
+    })
+
+def upsert_insert(model):
+    # Dialect-specific INSERT that supports ON CONFLICT (SQLite and PostgreSQL share the API)
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+def bump_tallies(increments):
+    # increments: {(form_id, question_id, company_id, option): n}
+    if not increments:
+        return
+    stmt = upsert_insert(AnswerTally)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['question_id', 'company_id', 'option'],
+        set_={'count': AnswerTally.count + stmt.excluded['count']}
+    )
+    db.session.execute(stmt, [
+        {'form_id': form_id, 'question_id': question_id, 'company_id': company_id, 'option': option, 'count': n}
+        for (form_id, question_id, company_id, option), n in increments.items()
+    ])
+
+def count_raw_answers(form_id=None, question_ids=None):
+    # Recount choice answers from the Answer table; the source of truth for the tallies
+    labels = question_labels(form_id)
+    counts = Counter()
+
+    # Typed answers are grouped in SQL by index/mask; only the distinct masks are expanded here
+    typed = (
+        db.select(Response.form_id, Answer.question_id, Response.company_id,
+                  Answer.option_index, Answer.option_mask, db.func.count())
+        .join(Response, Answer.response_id == Response.id)
+        .join(Question, Answer.question_id == Question.id)
+        .where(Question.question_type.in_(CHOICE_QUESTION_TYPES), Answer.answer_text.is_(None))
+        .group_by(Response.form_id, Answer.question_id, Response.company_id,
+                  Answer.option_index, Answer.option_mask)
+    )
+    if form_id is not None:
+        typed = typed.where(Response.form_id == form_id)
+    if question_ids is not None:
+        typed = typed.where(Answer.question_id.in_(question_ids))
+    for row_form_id, question_id, company_id, option_index, option_mask, n in db.session.execute(typed):
+        for option in answer_values(labels.get(question_id, []), None, option_index, option_mask, None):
+            counts[(row_form_id, question_id, company_id or 0, option)] += n
+
+    # Answers stored as text: typed columns fell back, or written before typed storage
+    query = (
+        db.select(Response.form_id, Answer.question_id, Response.company_id,
+                  Question.question_type, Answer.answer_text)
+        .join(Response, Answer.response_id == Response.id)
+        .join(Question, Answer.question_id == Question.id)
+        .where(Question.question_type.in_(CHOICE_QUESTION_TYPES), Answer.answer_text.isnot(None))
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    if form_id is not None:
+        query = query.where(Response.form_id == form_id)
+    if question_ids is not None:
+        query = query.where(Answer.question_id.in_(question_ids))
+    for row_form_id, question_id, company_id, question_type, answer_text in db.session.execute(query):
+        options = answer_text.split(', ') if question_type == 'checkbox' else [answer_text]
+        for option in options:
+            counts[(row_form_id, question_id, company_id or 0, option)] += 1
+    return counts
+
+def stored_tallies(form_id=None):
+    query = db.select(AnswerTally.form_id, AnswerTally.question_id, AnswerTally.company_id,
+                      AnswerTally.option, AnswerTally.count).where(AnswerTally.count != 0)
+    if form_id is not None:
+        query = query.where(AnswerTally.form_id == form_id)
+    return Counter({tuple(row[:4]): row[4] for row in db.session.execute(query)})
+
+def tally_summary(form_id):
+    summary = {}
+    for (_, question_id, company_id, option), count in stored_tallies(form_id).items():
+        entry = summary.setdefault(question_id, {'options': Counter(), 'by_company': {}})
+        entry['options'][option] += count
+        entry['by_company'].setdefault(company_id or None, Counter())[option] += count
+    return summary
+
+ROLLUP_GRANULARITIES = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+ROLLUP_DEFAULT_SPAN = {'hour': timedelta(hours=48), 'day': timedelta(days=30)}
+ROLLUP_MAX_BUCKETS = 2400
+
+def rollup_bucket(value, granularity):
+    if granularity == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def rollup_increments(rows, hourly_since=None):
+    # rows: (form_id, company_id, submitted_at); hourly buckets before hourly_since are skipped
+    counts = Counter()
+    for form_id, company_id, submitted_at in rows:
+        if submitted_at is None:
+            continue
+        counts[(form_id, company_id or 0, 'day', rollup_bucket(submitted_at, 'day'))] += 1
+        if hourly_since is None or submitted_at >= hourly_since:
+            counts[(form_id, company_id or 0, 'hour', rollup_bucket(submitted_at, 'hour'))] += 1
+    return counts
+
+def bump_rollups(increments):
+    # increments: {(form_id, company_id, granularity, bucket): n}
+    if not increments:
+        return
+    stmt = upsert_insert(ResponseRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['form_id', 'granularity', 'bucket', 'company_id'],
+        set_={'count': ResponseRollup.count + stmt.excluded['count']}
+    )
+    db.session.execute(stmt, [
+        {'form_id': form_id, 'company_id': company_id, 'granularity': granularity, 'bucket': bucket, 'count': n}
+        for (form_id, company_id, granularity, bucket), n in increments.items()
+    ])
+
+def hourly_rollup_cutoff():
+    cutoff = datetime.utcnow() - timedelta(days=app.config['ROLLUP_HOURLY_RETENTION_DAYS'])
+    return rollup_bucket(cutoff, 'hour')
+
+def parse_utc(value):
+    # ISO 8601 to the naive UTC datetimes the database stores
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def rollup_series(form_id, granularity, start, end):
+    # Zero-filled counts per company for buckets in [start, end); reads only the rollup table
+    step = ROLLUP_GRANULARITIES[granularity]
+    buckets = []
+    bucket = rollup_bucket(start, granularity)
+    while bucket < end:
+        buckets.append(bucket)
+        bucket += step
+    positions = {bucket: i for i, bucket in enumerate(buckets)}
+
+    rows = db.session.execute(
+        db.select(ResponseRollup.company_id, Company.name, ResponseRollup.bucket, ResponseRollup.count)
+        .outerjoin(Company, ResponseRollup.company_id == Company.id)
+        .where(ResponseRollup.form_id == form_id,
+               ResponseRollup.granularity == granularity,
+               ResponseRollup.bucket >= buckets[0],
+               ResponseRollup.bucket < end)
+    )
+    series = {}
+    for company_id, company_name, bucket, count in rows:
+        entry = series.setdefault(company_id, {
+            'company_id': company_id or None,
+            'company': company_name if company_id else None,
+            'counts': [0] * len(buckets),
+        })
+        entry['counts'][positions[bucket]] += count
+    companies = sorted(series.values(), key=lambda entry: -sum(entry['counts']))
+    totals = [sum(column) for column in zip(*(entry['counts'] for entry in companies))] or [0] * len(buckets)
+    return buckets, companies, totals
+
+RESPONSES_PAGE_SIZE = 50
+RESPONSES_MAX_LIMIT = 500
+
+def encode_cursor(submitted_at, response_id):
+    raw = f'{submitted_at.isoformat() if submitted_at else ""}|{response_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        submitted_at, response_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(submitted_at) if submitted_at else None, int(response_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+def responses_page(form_id, after=None, limit=RESPONSES_PAGE_SIZE):
+    # Keyset pagination, newest first, served by ix_response_form_submitted. Legacy
+    # rows without a submission time come after all the others, paged by id alone.
+    base = (
+        db.select(Response.id, Response.submitted_at, Company.name.label('company_name'))
+        .outerjoin(Company, Response.company_id == Company.id)
+        .where(Response.form_id == form_id)
+    )
+    rows = []
+    if after is None or after[0] is not None:
+        query = (base.where(Response.submitted_at.isnot(None))
+                 .order_by(Response.submitted_at.desc(), Response.id.desc()).limit(limit + 1))
+        if after is not None:
+            query = query.where(db.tuple_(Response.submitted_at, Response.id) < after)
+        rows = db.session.execute(query).all()
+    if len(rows) <= limit:
+        query = base.where(Response.submitted_at.is_(None)).order_by(Response.id.desc()).limit(limit + 1 - len(rows))
+        if after is not None and after[0] is None:
+            query = query.where(Response.id < after[1])
+        rows += db.session.execute(query).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].submitted_at, rows[-1].id)
+    return rows, next_cursor
+
+GRID_CHUNK_SIZE = 500  # stay well under SQLite's bound-parameter limit
+
+def build_response_grid(form_id, response_ids):
+    # Pivot the answers of a page of responses into {response_id: {question_id: text}}
+    labels = question_labels(form_id)
+    grid = {response_id: {} for response_id in response_ids}
+    for start in range(0, len(response_ids), GRID_CHUNK_SIZE):
+        chunk = response_ids[start:start + GRID_CHUNK_SIZE]
+        rows = db.session.execute(
+            db.select(Answer.response_id, Answer.question_id, Answer.answer_text,
+                      Answer.option_index, Answer.option_mask, Answer.numeric_value)
+            .where(Answer.response_id.in_(chunk))
+        )
+        for response_id, question_id, *stored in rows:
+            grid[response_id][question_id] = decode_answer(labels.get(question_id, []), *stored)
+    return grid
+
+def response_summary(form_id):
+    total, companies, latest = db.session.execute(
+        db.select(
+            db.func.count(Response.id),
+            db.func.count(db.distinct(Response.company_id)),
+            db.func.max(Response.submitted_at)
+        ).where(Response.form_id == form_id)
+    ).one()
+    return {'total': total, 'companies': companies, 'latest': latest}
+
 @app.route('/form/<int:form_id>/responses')
 @login_required
 def view_responses(form_id):
@@ -237,8 +1673,728 @@ def view_responses(form_id):
         flash('You do not have permission to view these responses')
         return redirect(url_for('dashboard'))
     
-    responses = Response.query.filter_by(form_id=form_id).all()
-    return render_template('view_responses.html', form=form, responses=responses)
+    try:
+        after = decode_cursor(request.args.get('after'))
+    except ValueError:
+        flash('Invalid page cursor')
+        return redirect(url_for('view_responses', form_id=form_id))
+
+    questions = Question.query.filter_by(form_id=form_id).order_by(Question.order).all()
+    search = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    snippets, has_more, next_cursor = {}, False, None
+    if search:
+        responses, snippets, has_more = search_responses(form_id, search, page, RESPONSES_PAGE_SIZE)
+    else:
+        responses, next_cursor = responses_page(form_id, after, RESPONSES_PAGE_SIZE)
+    grid = build_response_grid(form_id, [r.id for r in responses])
+    summary = response_summary(form_id)
+    tallies = tally_summary(form_id)
+    return render_template('view_responses.html', form=form, questions=questions,
+                           responses=responses, grid=grid, summary=summary, tallies=tallies,
+                           next_cursor=next_cursor, is_first_page=after is None,
+                           search=search, page=page, snippets=snippets, has_more=has_more)
+
+@app.route('/api/forms/<int:form_id>/responses')
+@login_required
+def api_responses(form_id):
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        return jsonify({'error': 'forbidden'}), 403
+
+    try:
+        after = decode_cursor(request.args.get('after'))
+    except ValueError:
+        return jsonify({'error': 'invalid cursor'}), 400
+    limit = min(max(request.args.get('limit', RESPONSES_PAGE_SIZE, type=int), 1), RESPONSES_MAX_LIMIT)
+
+    responses, next_cursor = responses_page(form_id, after, limit)
+    grid = build_response_grid(form_id, [r.id for r in responses])
+    return jsonify({
+        'responses': [{
+            'id': r.id,
+            'submitted_at': r.submitted_at.isoformat() if r.submitted_at else None,
+            'company': r.company_name,
+            'answers': {str(question_id): text for question_id, text in grid[r.id].items()}
+        } for r in responses],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/forms/<int:form_id>/summary')
+@login_required
+def api_form_summary(form_id):
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        return jsonify({'error': 'forbidden'}), 403
+
+    tallies = tally_summary(form_id)
+    questions = Question.query.filter(
+        Question.form_id == form_id,
+        Question.question_type.in_(CHOICE_QUESTION_TYPES)
+    ).order_by(Question.order).all()
+    return jsonify({'questions': [{
+        'id': question.id,
+        'text': question.question_text,
+        'options': dict(tallies.get(question.id, {}).get('options', {})),
+        'by_company': {
+            str(company_id) if company_id else 'none': dict(counts)
+            for company_id, counts in tallies.get(question.id, {}).get('by_company', {}).items()
+        }
+    } for question in questions]})
+
+@app.route('/api/forms/<int:form_id>/rollups')
+@login_required
+def api_form_rollups(form_id):
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        return jsonify({'error': 'forbidden'}), 403
+
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ROLLUP_GRANULARITIES:
+        return jsonify({'error': 'granularity must be hour or day'}), 400
+    try:
+        end = parse_utc(request.args['end']) if 'end' in request.args else None
+        start = parse_utc(request.args['start']) if 'start' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 dates'}), 400
+    # The current bucket is included by default
+    end = end or rollup_bucket(datetime.utcnow(), granularity) + ROLLUP_GRANULARITIES[granularity]
+    start = start or end - ROLLUP_DEFAULT_SPAN[granularity]
+    if start >= end:
+        return jsonify({'error': 'start must be before end'}), 400
+    if (end - start) / ROLLUP_GRANULARITIES[granularity] > ROLLUP_MAX_BUCKETS:
+        return jsonify({'error': f'at most {ROLLUP_MAX_BUCKETS} buckets per request'}), 400
+
+    buckets, companies, totals = rollup_series(form_id, granularity, start, end)
+    return jsonify({
+        'granularity': granularity,
+        'buckets': [bucket.isoformat() for bucket in buckets],
+        'companies': companies,
+        'totals': totals,
+    })
+
+@app.route('/form/<int:form_id>/analytics')
+@login_required
+def form_analytics(form_id):
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        flash('You do not have permission to view these responses')
+        return redirect(url_for('dashboard'))
+    return render_template('form_analytics.html', form=form,
+                           hourly_retention_days=app.config['ROLLUP_HOURLY_RETENTION_DAYS'])
+
+EXPORT_BATCH_SIZE = 1000
+
+def iter_response_rows(form_id, since=0):
+    # Merge-join two id-ordered cursors (responses and answers) so only one
+    # response worth of answers is ever held in memory.
+    responses = db.session.execute(
+        db.select(Response.id, Response.submitted_at, Company.name)
+        .outerjoin(Company, Response.company_id == Company.id)
+        .where(Response.form_id == form_id, Response.id > since)
+        .order_by(Response.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    labels = question_labels(form_id)
+    answers = db.session.execute(
+        db.select(Answer.response_id, Answer.question_id, Answer.answer_text,
+                  Answer.option_index, Answer.option_mask, Answer.numeric_value)
+        .join(Response, Answer.response_id == Response.id)
+        .where(Response.form_id == form_id, Response.id > since)
+        .order_by(Answer.response_id, Answer.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    pending = next(answers, None)
+    for response_id, submitted_at, company_name in responses:
+        row_answers = {}
+        while pending is not None and pending.response_id <= response_id:
+            if pending.response_id == response_id:
+                row_answers[pending.question_id] = decode_answer(labels.get(pending.question_id, []), *pending[2:])
+            pending = next(answers, None)
+        yield response_id, submitted_at, company_name, row_answers
+
+def export_csv_chunks(questions, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['Response ID', 'Submission Date', 'Company'] + [q.question_text for q in questions])
+    for count, (response_id, submitted_at, company_name, answers) in enumerate(rows, 1):
+        writer.writerow(
+            [response_id, submitted_at.strftime('%Y-%m-%d %H:%M:%S') if submitted_at else '', company_name or '']
+            + [answers.get(q.id, '') for q in questions]
+        )
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def export_jsonl_chunks(questions, rows):
+    lines = []
+    for response_id, submitted_at, company_name, answers in rows:
+        lines.append(json.dumps({
+            'response_id': response_id,
+            'submitted_at': submitted_at.isoformat() if submitted_at else None,
+            'company': company_name,
+            'answers': {str(q.id): answers[q.id] for q in questions if q.id in answers}
+        }) + '\n')
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/form/<int:form_id>/responses/export')
+@login_required
+def export_responses(form_id):
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        flash('You do not have permission to export these responses')
+        return redirect(url_for('dashboard'))
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'jsonl'):
+        return jsonify({'error': 'format must be csv or jsonl'}), 400
+    since = request.args.get('since', 0, type=int)
+
+    questions = Question.query.filter_by(form_id=form_id).order_by(Question.order).all()
+    rows = iter_response_rows(form_id, since)
+    if export_format == 'csv':
+        chunks = export_csv_chunks(questions, rows)
+        mimetype = 'text/csv'
+    else:
+        chunks = export_jsonl_chunks(questions, rows)
+        mimetype = 'application/x-ndjson'
+
+    headers = {
+        'Content-Disposition': f'attachment; filename=form_{form_id}_responses.{export_format}',
+        'Vary': 'Accept-Encoding'
+    }
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return HTTPResponse(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+# Columnar response snapshots for analytics. Per form: one fixed-width file per
+# column (response ids, timestamps, company ids and each question's typed
+# answers) plus an offsets/blob pair per question for text. Readers map the
+# files with numpy.memmap, so statistics over a whole form are vectorised and
+# never decode Answer rows. Refreshes append the responses after the last
+# snapshotted id; meta.json is replaced last and readers only map the rows it
+# commits to, so a half-written refresh is never visible.
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_CHUNK_SIZE = 50000
+SNAPSHOT_LOCK_STALE_SECONDS = 600
+SNAPSHOT_DTYPES = {
+    'response_id': '<i8',
+    'submitted_at': '<M8[us]',
+    'company_id': '<i4',  # 0 = no company
+    'index': '<i2',       # option position, -1 = not stored this way
+    'mask': '<i8',        # option bits, 0 = not stored this way
+    'numeric': '<f8',     # NaN = not stored this way
+    'offsets': '<i8',     # rows + 1 byte offsets into the question's text blob
+    'text': '|u1',
+}
+SNAPSHOT_MISSING = {'index': -1, 'mask': 0, 'numeric': float('nan')}
+SNAPSHOT_ANSWER_COLUMNS = {'index': 'option_index', 'mask': 'option_mask', 'numeric': 'numeric_value'}
+_snapshot_locks = {}  # form_id -> lock held while that form's snapshot is refreshed
+_snapshot_locks_lock = threading.Lock()
+
+def snapshots_enabled():
+    return np is not None
+
+def snapshot_dir(form_id):
+    return os.path.join(app.config['SNAPSHOT_FOLDER'], f'form_{form_id}')
+
+def snapshot_questions(form_id):
+    # The layout a snapshot is built for; any change to it means a full rebuild
+    labels = question_labels(form_id)
+    return [
+        {'id': question_id, 'encoding': answer_encoding(question_type), 'labels': labels.get(question_id, [])}
+        for question_id, question_type in db.session.execute(
+            db.select(Question.id, Question.question_type)
+            .where(Question.form_id == form_id).order_by(Question.order, Question.id)
+        )
+    ]
+
+def snapshot_layout(meta):
+    # (file name, dtype, item count) of every file the meta commits to
+    rows = meta['rows']
+    layout = [(name, SNAPSHOT_DTYPES[name], rows) for name in ('response_id', 'submitted_at', 'company_id')]
+    for question in meta['questions']:
+        prefix, encoding = f"q{question['id']}", question['encoding']
+        if encoding != 'text':
+            layout.append((f'{prefix}.{encoding}', SNAPSHOT_DTYPES[encoding], rows))
+        layout.append((f'{prefix}.offsets', SNAPSHOT_DTYPES['offsets'], rows + 1))
+        layout.append((f'{prefix}.text', SNAPSHOT_DTYPES['text'], meta['text_bytes'][str(question['id'])]))
+    return layout
+
+def snapshot_files_intact(directory, meta):
+    for name, dtype, count in snapshot_layout(meta):
+        path = os.path.join(directory, name + '.bin')
+        if not os.path.exists(path) or os.path.getsize(path) < count * np.dtype(dtype).itemsize:
+            return False
+    return True
+
+def read_snapshot_meta(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('format') == SNAPSHOT_FORMAT else None
+
+def write_snapshot_meta(directory, meta):
+    tmp_path = os.path.join(directory, 'meta.json.tmp')
+    with open(tmp_path, 'w') as meta_file:
+        json.dump(meta, meta_file)
+    os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+def append_snapshot_rows(directory, form_id, meta):
+    # Appends the responses after meta['last_response_id'] and returns the new meta.
+    # Files are first cut back to the committed size, dropping any half-written tail.
+    for name, dtype, count in snapshot_layout(meta):
+        with open(os.path.join(directory, name + '.bin'), 'ab') as column_file:
+            column_file.truncate(count * np.dtype(dtype).itemsize)
+    meta = dict(meta, text_bytes=dict(meta['text_bytes']))
+    questions = {question['id']: question for question in meta['questions']}
+    since = meta['last_response_id']
+    responses = db.session.execute(
+        db.select(Response.id, Response.submitted_at, Response.company_id)
+        .where(Response.form_id == form_id, Response.id > since)
+        .order_by(Response.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    answers = db.session.execute(
+        db.select(Answer.response_id, Answer.question_id, Answer.answer_text,
+                  Answer.option_index, Answer.option_mask, Answer.numeric_value)
+        .join(Response, Answer.response_id == Response.id)
+        .where(Response.form_id == form_id, Response.id > since)
+        .order_by(Answer.response_id, Answer.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    pending = next(answers, None)
+    for chunk in responses.partitions(SNAPSHOT_CHUNK_SIZE):
+        count = len(chunk)
+        columns = {
+            'response_id': np.fromiter((row.id for row in chunk), SNAPSHOT_DTYPES['response_id'], count),
+            'submitted_at': np.array([row.submitted_at for row in chunk], SNAPSHOT_DTYPES['submitted_at']),
+            'company_id': np.fromiter((row.company_id or 0 for row in chunk), SNAPSHOT_DTYPES['company_id'], count),
+        }
+        for question_id, question in questions.items():
+            if question['encoding'] != 'text':
+                columns[f"q{question_id}.{question['encoding']}"] = np.full(
+                    count, SNAPSHOT_MISSING[question['encoding']], SNAPSHOT_DTYPES[question['encoding']])
+        texts = {question_id: [b''] * count for question_id in questions}
+        positions = {response_id: i for i, response_id in enumerate(columns['response_id'].tolist())}
+        while pending is not None and pending.response_id <= chunk[-1].id:
+            row, question = positions.get(pending.response_id), questions.get(pending.question_id)
+            if row is not None and question is not None:
+                typed = getattr(pending, SNAPSHOT_ANSWER_COLUMNS.get(question['encoding'], 'answer_text'))
+                if question['encoding'] != 'text' and typed is not None:
+                    columns[f"q{question['id']}.{question['encoding']}"][row] = typed
+                else:  # free text, or a typed question's answer kept as text
+                    texts[question['id']][row] = decode_answer(question['labels'], *pending[2:]).encode()
+            pending = next(answers, None)
+
+        for name, values in columns.items():
+            with open(os.path.join(directory, name + '.bin'), 'ab') as column_file:
+                values.tofile(column_file)
+        for question_id, values in texts.items():
+            key = str(question_id)
+            offsets = meta['text_bytes'][key] + np.cumsum(
+                np.fromiter(map(len, values), SNAPSHOT_DTYPES['offsets'], count))
+            with open(os.path.join(directory, f'q{question_id}.offsets.bin'), 'ab') as offsets_file:
+                offsets.tofile(offsets_file)
+            with open(os.path.join(directory, f'q{question_id}.text.bin'), 'ab') as text_file:
+                text_file.write(b''.join(values))
+            meta['text_bytes'][key] = int(offsets[-1])
+        meta['rows'] += count
+        meta['last_response_id'] = chunk[-1].id
+    return meta
+
+def build_snapshot(form_id, questions):
+    # Written next to the live snapshot and swapped in, so readers never see it half-built
+    directory = snapshot_dir(form_id)
+    building, retired = directory + '.building', directory + '.old'
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+    meta = append_snapshot_rows(building, form_id, {
+        'format': SNAPSHOT_FORMAT, 'form_id': form_id, 'questions': questions,
+        'rows': 0, 'last_response_id': 0, 'text_bytes': {str(question['id']): 0 for question in questions}
+    })
+    write_snapshot_meta(building, meta)
+    shutil.rmtree(retired, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, retired)
+    os.rename(building, directory)
+    shutil.rmtree(retired, ignore_errors=True)
+    return meta
+
+def acquire_snapshot_lock(lock_path):
+    # A lock file works across worker processes; one left behind by a crashed refresh expires
+    for _ in range(2):
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) < SNAPSHOT_LOCK_STALE_SECONDS:
+                    return False
+                os.remove(lock_path)
+            except OSError:
+                return False
+    return False
+
+def snapshot_lock(form_id):
+    with _snapshot_locks_lock:
+        return _snapshot_locks.setdefault(form_id, threading.Lock())
+
+def refresh_snapshot(form_id, rebuild=False):
+    # Brings the form's snapshot up to date and returns its meta, or None when another
+    # process is refreshing it (the current snapshot stays readable meanwhile).
+    # Edited questions, deleted responses or damaged files trigger a full rebuild.
+    os.makedirs(app.config['SNAPSHOT_FOLDER'], exist_ok=True)
+    lock_path = snapshot_dir(form_id) + '.lock'
+    with snapshot_lock(form_id):
+        if not acquire_snapshot_lock(lock_path):
+            return None
+        try:
+            directory = snapshot_dir(form_id)
+            questions = snapshot_questions(form_id)
+            meta = read_snapshot_meta(directory)
+            if (rebuild or meta is None or meta['questions'] != questions
+                    or not snapshot_files_intact(directory, meta)
+                    or db.session.scalar(
+                        db.select(db.func.count(Response.id))
+                        .where(Response.form_id == form_id, Response.id <= meta['last_response_id'])
+                    ) != meta['rows']):
+                return build_snapshot(form_id, questions)
+            refreshed = append_snapshot_rows(directory, form_id, meta)
+            if refreshed['rows'] != meta['rows']:
+                write_snapshot_meta(directory, refreshed)
+            return refreshed
+        finally:
+            os.remove(lock_path)
+
+def remove_snapshot(form_id):
+    shutil.rmtree(snapshot_dir(form_id), ignore_errors=True)
+
+def map_snapshot_file(path, dtype, count):
+    if count == 0:
+        return np.empty(0, dtype)  # an empty range cannot be memory-mapped
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+class ResponseSnapshot:
+    # Read-only view of a form's snapshot; every column is a numpy.memmap
+    def __init__(self, directory, meta):
+        self.meta = meta
+        self.rows = meta['rows']
+        self.questions = meta['questions']
+        self.columns = {
+            name: map_snapshot_file(os.path.join(directory, name + '.bin'), dtype, count)
+            for name, dtype, count in snapshot_layout(meta)
+        }
+        self.response_id = self.columns['response_id']
+        self.submitted_at = self.columns['submitted_at']
+        self.company_id = self.columns['company_id']
+
+    def answers(self, question):
+        # The question's typed column, or None for free-text questions
+        return self.columns.get(f"q{question['id']}.{question['encoding']}")
+
+    def text_lengths(self, question):
+        return np.diff(self.columns[f"q{question['id']}.offsets"])
+
+    def text(self, question, row):
+        offsets = self.columns[f"q{question['id']}.offsets"]
+        return self.columns[f"q{question['id']}.text"][offsets[row]:offsets[row + 1]].tobytes().decode()
+
+def load_snapshot(form_id):
+    directory = snapshot_dir(form_id)
+    meta = read_snapshot_meta(directory)
+    if meta is None or not snapshot_files_intact(directory, meta):
+        return None
+    try:
+        return ResponseSnapshot(directory, meta)
+    except OSError:
+        return None  # swapped out by a rebuild between reading the meta and mapping
+
+def snapshot_statistics(snapshot, company_id=None, start=None, end=None):
+    selected = np.ones(snapshot.rows, dtype=bool)
+    if company_id is not None:
+        selected &= snapshot.company_id == company_id
+    if start is not None:
+        selected &= snapshot.submitted_at >= np.datetime64(start, 'us')
+    if end is not None:
+        selected &= snapshot.submitted_at < np.datetime64(end, 'us')
+
+    companies, company_counts = np.unique(snapshot.company_id[selected], return_counts=True)
+    questions = []
+    for question in snapshot.questions:
+        encoding, labels = question['encoding'], question['labels']
+        has_text = snapshot.text_lengths(question)[selected] > 0
+        stats = {'id': question['id'], 'encoding': encoding}
+        if encoding == 'text':
+            answered = np.zeros_like(has_text)
+        else:
+            values = snapshot.answers(question)[selected]
+            if encoding == 'index':
+                answered = values >= 0
+                counts = np.bincount(values[answered], minlength=len(labels))
+                stats['options'] = {}
+                for index, label in enumerate(labels):
+                    stats['options'][label] = stats['options'].get(label, 0) + int(counts[index])
+            elif encoding == 'mask':
+                answered = values != 0
+                stats['options'] = {}
+                for index, label in enumerate(labels[:OPTION_MASK_BITS]):
+                    stats['options'][label] = (stats['options'].get(label, 0)
+                                               + int(np.count_nonzero(values & (1 << index))))
+            else:
+                answered = ~np.isnan(values)
+                numbers = values[answered]
+                stats['numeric'] = {
+                    'mean': float(numbers.mean()), 'min': float(numbers.min()), 'max': float(numbers.max()),
+                    'p50': float(np.percentile(numbers, 50)), 'p90': float(np.percentile(numbers, 90)),
+                } if numbers.size else None
+            stats['other'] = int(np.count_nonzero(has_text & ~answered))  # kept as text
+        stats['answered'] = int(np.count_nonzero(answered | has_text))
+        questions.append(stats)
+    return {
+        'responses': int(np.count_nonzero(selected)),
+        'by_company': {str(company) if company else 'none': int(count)
+                       for company, count in zip(companies.tolist(), company_counts.tolist())},
+        'questions': questions,
+    }
+
+@app.route('/api/forms/<int:form_id>/statistics')
+@login_required
+def api_form_statistics(form_id):
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        return jsonify({'error': 'forbidden'}), 403
+    if not snapshots_enabled():
+        return jsonify({'error': 'statistics need numpy, which is not installed'}), 501
+
+    try:
+        start = parse_utc(request.args['start']) if 'start' in request.args else None
+        end = parse_utc(request.args['end']) if 'end' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 dates'}), 400
+    company_id = request.args.get('company_id', type=int)
+
+    refresh_snapshot(form_id)
+    snapshot = load_snapshot(form_id)
+    if snapshot is None:
+        return jsonify({'error': 'the snapshot is still being built, try again shortly'}), 503
+    statistics = snapshot_statistics(snapshot, company_id, start, end)
+    texts = dict(db.session.execute(
+        db.select(Question.id, Question.question_text).where(Question.form_id == form_id)
+    ).all())
+    for question in statistics['questions']:
+        question['text'] = texts.get(question['id'])
+    return jsonify({'snapshot': {'rows': snapshot.rows, 'last_response_id': snapshot.meta['last_response_id']},
+                    **statistics})
+
+# Full-text search over responses: an FTS5 table with one row per response
+# (rowid = response id) holding its decoded answers. SQLite only; elsewhere
+# search falls back to a LIKE scan of the free-text answers.
+SEARCH_TABLE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS response_search USING fts5("
+    "body, form_id UNINDEXED, company_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+)
+db.event.listen(db.metadata, 'after_create', db.DDL(SEARCH_TABLE_DDL).execute_if(dialect='sqlite'))
+db.event.listen(db.metadata, 'before_drop', db.DDL('DROP TABLE IF EXISTS response_search').execute_if(dialect='sqlite'))
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_LIMIT = 100
+SEARCH_TOKEN_RE = re.compile(r'\w+')
+SNIPPET_START, SNIPPET_END = '\x02', '\x03'  # swapped for <mark> after escaping
+
+def search_index_enabled():
+    return db.engine.dialect.name == 'sqlite'
+
+def index_responses(rows):
+    # rows: (response_id, form_id, company_id, body); joins the caller's transaction
+    if not rows or not search_index_enabled():
+        return
+    db.session.execute(
+        db.text('INSERT INTO response_search (rowid, body, form_id, company_id) '
+                'VALUES (:response_id, :body, :form_id, :company_id)'),
+        [{'response_id': response_id, 'form_id': form_id, 'company_id': company_id, 'body': body}
+         for response_id, form_id, company_id, body in rows]
+    )
+
+def reindex_responses(form_id, response_ids):
+    # Rewrite the search rows of these responses from their stored answers, e.g. after
+    # a form edit deleted or re-encoded some of them; joins the caller's transaction
+    if not search_index_enabled():
+        return
+    labels = question_labels(form_id)
+    for start in range(0, len(response_ids), EXPORT_BATCH_SIZE):
+        chunk = response_ids[start:start + EXPORT_BATCH_SIZE]
+        db.session.execute(
+            db.text('DELETE FROM response_search WHERE rowid IN :ids').bindparams(db.bindparam('ids', expanding=True)),
+            {'ids': chunk}
+        )
+        texts = {response_id: [] for response_id in chunk}
+        for row in db.session.execute(
+            db.select(Answer.response_id, Answer.question_id, Answer.answer_text,
+                      Answer.option_index, Answer.option_mask, Answer.numeric_value)
+            .where(Answer.response_id.in_(chunk)).order_by(Answer.response_id, Answer.id)
+        ):
+            texts[row.response_id].append(decode_answer(labels.get(row.question_id, []), *row[2:]))
+        index_responses([
+            (response_id, form_id, company_id, '\n'.join(texts[response_id]))
+            for response_id, company_id in db.session.execute(
+                db.select(Response.id, Response.company_id).where(Response.id.in_(chunk)).order_by(Response.id)
+            )
+        ])
+
+def unindex_form_statements(form_id):
+    # Must run before the form's responses are deleted
+    if not search_index_enabled():
+        return ()
+    return (db.text('DELETE FROM response_search WHERE rowid IN (SELECT id FROM response WHERE form_id = :form_id)')
+            .bindparams(form_id=form_id),)
+
+def fts_query(text):
+    # Free text to a safe FTS5 query: every word must match, the last one as a prefix
+    tokens = SEARCH_TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"' for token in tokens) + '*'
+
+def snippet_html(snippet):
+    return Markup(str(escape(snippet)).replace(SNIPPET_START, '<mark>').replace(SNIPPET_END, '</mark>'))
+
+def search_responses(form_id, text, page, limit):
+    # Best matches first. Returns (responses, {response_id: snippet}, has_more)
+    if search_index_enabled():
+        match = fts_query(text)
+        if match is None:
+            return [], {}, False
+        hits = db.session.execute(db.text(
+            "SELECT rowid, snippet(response_search, 0, :start, :end, '…', 12) FROM response_search "
+            "WHERE response_search MATCH :match AND form_id = :form_id "
+            "ORDER BY bm25(response_search) LIMIT :limit OFFSET :offset"
+        ), {'start': SNIPPET_START, 'end': SNIPPET_END, 'match': match, 'form_id': form_id,
+            'limit': limit + 1, 'offset': (page - 1) * limit}).all()
+        snippets = {response_id: snippet_html(snippet) for response_id, snippet in hits}
+    else:
+        hits = db.session.execute(
+            db.select(Answer.response_id).distinct()
+            .join(Response, Answer.response_id == Response.id)
+            .where(Response.form_id == form_id, Answer.answer_text.ilike(f'%{text}%'))
+            .order_by(Answer.response_id.desc())
+            .limit(limit + 1).offset((page - 1) * limit)
+        ).all()
+        snippets = {}
+    has_more = len(hits) > limit
+    ranked_ids = [hit[0] for hit in hits[:limit]]
+    rows = {
+        row.id: row for row in db.session.execute(
+            db.select(Response.id, Response.submitted_at, Company.name.label('company_name'))
+            .outerjoin(Company, Response.company_id == Company.id)
+            .where(Response.id.in_(ranked_ids))
+        )
+    }
+    return [rows[response_id] for response_id in ranked_ids if response_id in rows], snippets, has_more
+
+@app.route('/api/forms/<int:form_id>/responses/search')
+@login_required
+def api_search_responses(form_id):
+    form = Form.query.get_or_404(form_id)
+    if form.user_id != current_user.id:
+        return jsonify({'error': 'forbidden'}), 403
+
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'q is required'}), 400
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = min(max(request.args.get('limit', SEARCH_PAGE_SIZE, type=int), 1), SEARCH_MAX_LIMIT)
+
+    responses, snippets, has_more = search_responses(form_id, text, page, limit)
+    grid = build_response_grid(form_id, [r.id for r in responses])
+    return jsonify({
+        'query': text,
+        'page': page,
+        'has_more': has_more,
+        'results': [{
+            'id': r.id,
+            'submitted_at': r.submitted_at.isoformat() if r.submitted_at else None,
+            'company': r.company_name,
+            'snippet': snippets.get(r.id),
+            'answers': {str(question_id): answer for question_id, answer in grid[r.id].items()}
+        } for r in responses]
+    })
+
+def delete_form_rows(form_id):
+    # Set-based deletes of a form and everything hanging off it; the caller commits.
+    # Returns the uploaded files to unlink once the transaction is durable.
+    response_ids = db.select(Response.id).where(Response.form_id == form_id)
+    question_ids = db.select(Question.id).where(Question.form_id == form_id)
+    uploads = db.session.execute(
+        db.select(PDFUpload.filename, PDFUpload.blob_id).where(PDFUpload.form_id == form_id)
+    ).all()
+    for statement in (
+        db.delete(Answer).where(Answer.response_id.in_(response_ids)),
+        *unindex_form_statements(form_id),
+        db.delete(SubmissionKey).where(SubmissionKey.form_id == form_id),
+        db.delete(AnswerTally).where(AnswerTally.form_id == form_id),
+        db.delete(ResponseRollup).where(ResponseRollup.form_id == form_id),
+        db.delete(QuestionOption).where(QuestionOption.question_id.in_(question_ids)),
+        db.delete(Response).where(Response.form_id == form_id),
+        db.delete(Question).where(Question.form_id == form_id),
+        db.delete(ExtractionJob).where(ExtractionJob.form_id == form_id),
+        db.delete(PDFUpload).where(PDFUpload.form_id == form_id),
+        db.delete(Form).where(Form.id == form_id),
+    ):
+        db.session.execute(statement, execution_options={'synchronize_session': False})
+    legacy_files = [filename for filename, blob_id in uploads if blob_id is None]
+    return legacy_files + release_blobs(Counter(blob_id for _, blob_id in uploads if blob_id is not None))
+
+def remove_uploaded_files(filenames):
+    for filename in filenames:
+        # A concurrent upload may have re-created the blob since it was released
+        if db.session.scalar(db.select(PDFBlob.id).where(PDFBlob.path == filename)) is not None:
+            continue
+        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        if os.path.exists(pdf_path):
+            try:
+                os.remove(pdf_path)
+            except Exception as e:
+                app.logger.warning(f"Error deleting PDF file: {e}")
+
+def delete_form_everything(form_id):
+    try:
+        pdf_filenames = delete_form_rows(form_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    render_cache.invalidate(form_id)
+    validator_cache.invalidate(form_id)
+    remove_uploaded_files(pdf_filenames)
+    if snapshots_enabled():
+        remove_snapshot(form_id)
+
+# Single worker: large deletes are write-heavy and SQLite has one writer anyway
+delete_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='form-delete')
+
+def delete_form_in_background(form_id):
+    with app.app_context():
+        try:
+            delete_form_everything(form_id)
+        except Exception:
+            app.logger.exception('Background deletion of form %s failed', form_id)
 
 @app.route('/form/<int:form_id>/delete', methods=['POST'])
 @login_required
@@ -248,164 +2404,324 @@ def delete_form(form_id):
         flash('You do not have permission to delete this form')
         return redirect(url_for('dashboard'))
     
+    response_count = db.session.scalar(db.select(db.func.count(Response.id)).where(Response.form_id == form_id))
+    if response_count > app.config['BACKGROUND_DELETE_THRESHOLD']:
+        delete_executor.submit(delete_form_in_background, form_id)
+        flash('This form has a lot of responses and is being deleted in the background')
+        return redirect(url_for('dashboard'))
+    
     try:
-        # Step 1: Delete associated PDF file and record
-        pdf_upload = PDFUpload.query.filter_by(form_id=form.id).first()
-        if pdf_upload:
-            pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], pdf_upload.filename)
-            if os.path.exists(pdf_path):
-                try:
-                    os.remove(pdf_path)
-                except Exception as e:
-                    print(f"Error deleting PDF file: {e}")
-            db.session.delete(pdf_upload)
-            db.session.commit()
-        
-        # Step 2: Delete all answers
-        answers = Answer.query.join(Response).filter(Response.form_id == form_id).all()
-        for answer in answers:
-            db.session.delete(answer)
-        db.session.commit()
-        
-        # Step 3: Delete all responses
-        responses = Response.query.filter_by(form_id=form_id).all()
-        for response in responses:
-            db.session.delete(response)
-        db.session.commit()
-        
-        # Step 4: Delete all questions
-        questions = Question.query.filter_by(form_id=form_id).all()
-        for question in questions:
-            db.session.delete(question)
-        db.session.commit()
-        
-        # Step 5: Finally, delete the form
-        db.session.delete(form)
-        db.session.commit()
-        
+        delete_form_everything(form_id)
         flash('Form and all associated data deleted successfully')
     except Exception as e:
-        db.session.rollback()
         flash(f'Error deleting form: {str(e)}')
-        return redirect(url_for('dashboard'))
     
     return redirect(url_for('dashboard'))
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+def blob_relative_path(digest):
+    # Shard by the first two byte pairs so no directory grows unbounded
+    return os.path.join(digest[:2], digest[2:4], f'{digest}.pdf')
+
+def store_upload_stream(stream):
+    # Hash while streaming to a temporary file, then move it to its content address
+    upload_folder = app.config['UPLOAD_FOLDER']
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        digest = sha256.hexdigest()
+        relative_path = blob_relative_path(digest)
+        final_path = os.path.join(upload_folder, relative_path)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest, size, relative_path
+
+def acquire_blob(digest, size, relative_path):
+    # Take a reference on the blob for digest, creating its row if needed; the caller commits
+    blob = PDFBlob.query.filter_by(sha256=digest).first()
+    if blob is None:
+        try:
+            # Savepoint: a concurrent first upload of the same file may insert the row first
+            with db.session.begin_nested():
+                blob = PDFBlob(sha256=digest, path=relative_path, size=size, ref_count=1)
+                db.session.add(blob)
+            return blob
+        except IntegrityError:
+            blob = PDFBlob.query.filter_by(sha256=digest).one()
+    db.session.execute(db.update(PDFBlob).where(PDFBlob.id == blob.id).values(ref_count=PDFBlob.ref_count + 1))
+    return blob
+
+def release_blobs(counts):
+    # Drop references ({blob_id: n}); blobs nobody references any more are deleted
+    # and their paths returned so the files can be removed after commit
+    if not counts:
+        return []
+    for blob_id, n in counts.items():
+        db.session.execute(db.update(PDFBlob).where(PDFBlob.id == blob_id).values(ref_count=PDFBlob.ref_count - n))
+    unreferenced = db.session.execute(
+        db.select(PDFBlob.id, PDFBlob.path).where(PDFBlob.id.in_(list(counts)), PDFBlob.ref_count <= 0)
+    ).all()
+    if unreferenced:
+        db.session.execute(db.delete(PDFBlob).where(PDFBlob.id.in_([blob_id for blob_id, _ in unreferenced])),
+                           execution_options={'synchronize_session': False})
+    return [path for _, path in unreferenced]
+
+def discard_upload(upload_id):
+    # Drop an upload that produced no form, and its blob reference, in the caller's
+    # transaction; returns the files to remove after commit
+    row = db.session.execute(
+        db.select(PDFUpload.filename, PDFUpload.blob_id).where(PDFUpload.id == upload_id)
+    ).first()
+    if row is None:
+        return []
+    db.session.execute(db.update(ExtractionJob).where(ExtractionJob.pdf_upload_id == upload_id)
+                       .values(pdf_upload_id=None))
+    db.session.execute(db.delete(PDFUpload).where(PDFUpload.id == upload_id),
+                       execution_options={'synchronize_session': False})
+    if row.blob_id is None:
+        return [row.filename]
+    return release_blobs(Counter({row.blob_id: 1}))
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
 
+# Line markers recognised by the PDF question parser
+MC_MARKER_RE = re.compile(r'\([a-dA-D]\)')  # (a) .. (d), (A) .. (D)
+CHECKBOX_MARKER_RE = re.compile(r'\[ {1,2}\]|□')  # [ ], [  ] or a ballot box
+NON_ALPHA_ASCII_RE = re.compile(r'[^A-Za-z ]+')
+
+LINE_EMPTY, LINE_MC_OPTION, LINE_CHECKBOX_OPTION, LINE_BLANK, LINE_QUESTION, LINE_OTHER = range(6)
+
+def clean_text(text):
+    # Keep only letters and spaces, collapsing runs of spaces
+    if text.isascii():
+        text = NON_ALPHA_ASCII_RE.sub('', text)
+    else:
+        text = ''.join(c for c in text if c.isalpha() or c == ' ')
+    return ' '.join(text.split())
+
+def classify_line(line):
+    # Returns (kind, has_checkbox_marker); each line is inspected exactly once
+    if not line:
+        return LINE_EMPTY, False
+    has_checkbox = CHECKBOX_MARKER_RE.search(line) is not None
+    if MC_MARKER_RE.search(line):
+        return LINE_MC_OPTION, has_checkbox
+    if has_checkbox:
+        return LINE_CHECKBOX_OPTION, True
+    if '_' in line:
+        return LINE_BLANK, False
+    if line.endswith('?'):
+        return LINE_QUESTION, False
+    return LINE_OTHER, False
+
+def mc_option_text(line):
+    # Drop everything up to the first ')' of the option marker
+    return clean_text(line.split(')', 1)[1].strip() if ')' in line else line)
+
+def checkbox_option_text(line):
+    return clean_text(CHECKBOX_MARKER_RE.sub('', line).strip())
+
+def parse_page_questions(text):
+    tokens = [(line,) + classify_line(line) for line in (raw.strip() for raw in text.split('\n'))]
+    count = len(tokens)
+    i = 0
+    while i < count:
+        line, kind, _ = tokens[i]
+
+        if kind == LINE_MC_OPTION or (kind == LINE_QUESTION and i + 1 < count and tokens[i + 1][1] == LINE_MC_OPTION):
+            # A line carrying options itself, or a '?' question followed by options
+            required = True if kind == LINE_MC_OPTION else '*' in line
+            question_text = clean_text(line if kind == LINE_MC_OPTION else line.replace('*', '').strip())
+            options = []
+            while i + 1 < count and tokens[i + 1][1] == LINE_MC_OPTION:
+                i += 1
+                options.append(mc_option_text(tokens[i][0]))
+            yield {'text': question_text, 'type': 'multiple_choice', 'options': options, 'required': required}
+
+        elif kind == LINE_CHECKBOX_OPTION:
+            question_text = clean_text(line)
+            options = []
+            while i + 1 < count and tokens[i + 1][2]:
+                i += 1
+                options.append(checkbox_option_text(tokens[i][0]))
+            yield {'text': question_text, 'type': 'checkbox', 'options': options, 'required': True}
+
+        elif kind == LINE_BLANK:
+            # "Question? ______" -- a free-text question answered on the blank
+            prompt = line.split('_', 1)[0].strip()
+            if prompt.endswith('?'):
+                yield {'text': clean_text(prompt), 'type': 'text', 'required': True}
+
+        elif kind == LINE_QUESTION:
+            yield {'text': clean_text(line.replace('*', '').strip()), 'type': 'text', 'required': '*' in line}
+
+        i += 1
+
+def iter_pdf_questions(pdf_path):
+    # Pages are parsed as they are extracted rather than after reading the whole document
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page in reader.pages:
+            yield from parse_page_questions(page.extract_text())
+
 def extract_questions_from_pdf(pdf_path):
-    questions = []
-    try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text = page.extract_text()
-                lines = text.split('\n')
-                i = 0
-                while i < len(lines):
-                    line = lines[i].strip()
-                    next_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
-                    
-                    # Skip empty lines
-                    if not line:
-                        i += 1
-                        continue
-                    
-                    # Function to clean text - only keep alphabets and spaces
-                    def clean_text(text):
-                        # Keep only alphabets and spaces
-                        text = ''.join(c for c in text if c.isalpha() or c == ' ')
-                        # Remove extra spaces
-                        text = ' '.join(text.split())
-                        return text
-                    
-                    # Check for multiple choice questions
-                    if any(option in line for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
-                        question_text = clean_text(line)
-                        options = []
-                        while i + 1 < len(lines) and any(option in lines[i + 1] for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
-                            i += 1
-                            option_text = lines[i].strip()
-                            # Remove option markers and clean text
-                            option_text = option_text.split(')', 1)[1].strip() if ')' in option_text else option_text
-                            option_text = clean_text(option_text)
-                            options.append(option_text)
-                        
-                        questions.append({
-                            'text': question_text,
-                            'type': 'multiple_choice',
-                            'options': options,
-                            'required': True
-                        })
-                    
-                    # Check for checkbox questions
-                    elif any(checkbox in line for checkbox in ['[ ]', '[  ]', '□']):
-                        question_text = clean_text(line)
-                        options = []
-                        while i + 1 < len(lines) and any(checkbox in lines[i + 1] for checkbox in ['[ ]', '[  ]', '□']):
-                            i += 1
-                            option_text = lines[i].strip()
-                            # Remove checkbox markers and clean text
-                            option_text = option_text.replace('[ ]', '').replace('[  ]', '').replace('□', '').strip()
-                            option_text = clean_text(option_text)
-                            options.append(option_text)
-                        
-                        questions.append({
-                            'text': question_text,
-                            'type': 'checkbox',
-                            'options': options,
-                            'required': True
-                        })
-                    
-                    # Check for text input questions (with underline)
-                    elif '_' in line or '___' in line:
-                        # Extract the question part before the underline
-                        question_text = line.split('_')[0].strip()
-                        question_text = clean_text(question_text)
-                        if question_text.endswith('?'):
-                            questions.append({
-                                'text': question_text,
-                                'type': 'text',
-                                'required': True
-                            })
-                    
-                    # Check for regular questions
-                    elif line.endswith('?'):
-                        # Check if it's a required question (marked with *)
-                        required = '*' in line
-                        question_text = line.replace('*', '').strip()
-                        question_text = clean_text(question_text)
-                        
-                        # Check if next line has options
-                        if i + 1 < len(lines) and any(option in lines[i + 1] for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
-                            options = []
-                            while i + 1 < len(lines) and any(option in lines[i + 1] for option in ['(a)', '(b)', '(c)', '(d)', '(A)', '(B)', '(C)', '(D)']):
-                                i += 1
-                                option_text = lines[i].strip()
-                                # Remove option markers and clean text
-                                option_text = option_text.split(')', 1)[1].strip() if ')' in option_text else option_text
-                                option_text = clean_text(option_text)
-                                options.append(option_text)
-                            
-                            questions.append({
-                                'text': question_text,
-                                'type': 'multiple_choice',
-                                'options': options,
-                                'required': required
-                            })
-                        else:
-                            questions.append({
-                                'text': question_text,
-                                'type': 'text',
-                                'required': required
-                            })
-                    
-                    i += 1
-                    
-    except Exception as e:
-        flash(f'Error processing PDF: {str(e)}')
-    return questions
+    return list(iter_pdf_questions(pdf_path))
+
+def insert_question_rows(form_id, rows):
+    # Bulk insert questions ({'text', 'type', 'required', 'order', optional 'options'})
+    # and their question_option rows; the caller commits
+    if not rows:
+        return
+    question_ids = db.session.scalars(
+        db.insert(Question).returning(Question.id, sort_by_parameter_order=True),
+        [{
+            'form_id': form_id,
+            'question_text': q['text'],
+            'question_type': q['type'],
+            'required': q['required'],
+            'order': q['order'],
+            'options': json.dumps(q['options']) if 'options' in q else None
+        } for q in rows]
+    ).all()
+    option_rows = [
+        {'question_id': question_id, 'position': position, 'label': label}
+        for question_id, q in zip(question_ids, rows)
+        for position, label in enumerate(q.get('options', []))
+    ]
+    if option_rows:
+        db.session.execute(db.insert(QuestionOption), option_rows)
+
+def create_form_from_questions(questions, title, description, user_id, company_id):
+    form = Form(
+        title=title,
+        description=description,
+        user_id=user_id,
+        company_id=company_id
+    )
+    db.session.add(form)
+    db.session.flush()
+    insert_question_rows(form.id, [dict(q, order=i) for i, q in enumerate(questions)])
+    return form
+
+JOB_ACTIVE_STATUSES = ('queued', 'running')
+
+_pdf_pool = None
+_job_dispatcher = None
+_job_executor_lock = threading.Lock()
+
+def get_job_executors():
+    # Extraction runs in worker processes; one dispatcher thread per worker
+    # tracks job state in the DB. Created lazily so CLI commands never fork.
+    global _pdf_pool, _job_dispatcher
+    with _job_executor_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=app.config['PDF_WORKERS'])
+            _job_dispatcher = ThreadPoolExecutor(max_workers=app.config['PDF_WORKERS'], thread_name_prefix='pdf-job')
+    return _pdf_pool, _job_dispatcher
+
+def replace_broken_pdf_pool(broken):
+    # A worker that died (killed, out of memory) breaks the whole pool for good
+    global _pdf_pool
+    with _job_executor_lock:
+        if _pdf_pool is broken:
+            _pdf_pool = ProcessPoolExecutor(max_workers=app.config['PDF_WORKERS'])
+    broken.shutdown(wait=False)
+
+def stale_job_cutoff():
+    return datetime.utcnow() - timedelta(seconds=app.config['PDF_JOB_STALE_SECONDS'])
+
+def active_job_count(user_id):
+    return db.session.scalar(
+        db.select(db.func.count(ExtractionJob.id))
+        .where(ExtractionJob.user_id == user_id,
+               ExtractionJob.status.in_(JOB_ACTIVE_STATUSES),
+               ExtractionJob.created_at >= stale_job_cutoff())
+    )
+
+def finish_job(job_id, from_status, **values):
+    # Conditional so a job expired meanwhile (or finished elsewhere) is left alone;
+    # returns whether this caller got to finish it
+    result = db.session.execute(
+        db.update(ExtractionJob)
+        .where(ExtractionJob.id == job_id, ExtractionJob.status.in_(from_status))
+        .values({'finished_at': datetime.utcnow(), **values})
+    )
+    return result.rowcount == 1
+
+def expire_stale_job(job):
+    # Jobs only run in the dispatcher of the process that queued them, so one left
+    # queued/running by a restart would otherwise be polled forever
+    if job.status not in JOB_ACTIVE_STATUSES or job.created_at >= stale_job_cutoff():
+        return
+    pdf_filenames = []
+    if finish_job(job.id, JOB_ACTIVE_STATUSES, status='failed',
+                  error='Processing was interrupted. Please upload the PDF again.'):
+        pdf_filenames = discard_upload(job.pdf_upload_id)
+        db.session.commit()
+    else:
+        db.session.rollback()
+    db.session.refresh(job)
+    remove_uploaded_files(pdf_filenames)
+
+def run_extraction_job(job_id):
+    pool, _ = get_job_executors()
+    with app.app_context():
+        job = db.session.get(ExtractionJob, job_id)
+        if not finish_job(job_id, ('queued',), status='running', finished_at=None):
+            db.session.rollback()
+            return  # expired before a dispatcher thread got to it
+        db.session.commit()
+        upload_id = job.pdf_upload_id
+        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], job.pdf_upload.filename)
+        pdf_filenames = []
+        try:
+            try:
+                questions = pool.submit(extract_questions_from_pdf, pdf_path).result()
+            except BrokenProcessPool:
+                replace_broken_pdf_pool(pool)
+                raise
+            blob = job.pdf_upload.blob
+            if blob is not None and blob.extracted_questions is None:
+                # Cache per content hash so re-uploads of this PDF skip extraction
+                blob.extracted_questions = json.dumps(questions)
+                db.session.commit()
+            if not questions:
+                raise ValueError('No questions found in the PDF')
+            form = create_form_from_questions(
+                questions,
+                title=f"Form from {job.pdf_upload.original_filename}",
+                description="Automatically generated from PDF",
+                user_id=job.user_id,
+                company_id=job.company_id
+            )
+            job.pdf_upload.form_id = form.id
+            if not finish_job(job_id, ('running',), status='done', form_id=form.id):
+                db.session.rollback()  # expired while extracting; its form is not created
+                return
+        except Exception as e:
+            db.session.rollback()
+            if finish_job(job_id, ('running',), status='failed', error=str(e) or type(e).__name__):
+                pdf_filenames = discard_upload(upload_id)
+        db.session.commit()
+        remove_uploaded_files(pdf_filenames)
 
 @app.route('/upload_pdf', methods=['GET', 'POST'])
 @login_required
@@ -422,48 +2738,41 @@ def upload_pdf():
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            file.save(file_path)
+            digest, size, relative_path = store_upload_stream(file.stream)
+            
+            cached = db.session.scalar(db.select(PDFBlob.extracted_questions).where(PDFBlob.sha256 == digest))
+            if cached is not None and not json.loads(cached):
+                remove_uploaded_files([relative_path])  # kept if another upload references it
+                flash('No questions found in the PDF')
+                return redirect(url_for('upload_pdf'))
+            if cached is None and active_job_count(current_user.id) >= app.config['PDF_JOBS_PER_USER']:
+                remove_uploaded_files([relative_path])  # kept if another upload references it
+                flash('You already have PDFs being processed. Please wait for them to finish.')
+                return redirect(url_for('upload_pdf'))
             
             # Create PDF upload record
+            blob = acquire_blob(digest, size, relative_path)
             pdf_upload = PDFUpload(
-                filename=unique_filename,
+                filename=blob.path,
                 original_filename=filename,
                 user_id=current_user.id,
+                blob_id=blob.id,
                 form_id=None  # Will be updated after form creation
             )
             db.session.add(pdf_upload)
-            db.session.commit()
+            db.session.flush()
             
-            # Extract questions and create form
-            questions = extract_questions_from_pdf(file_path)
-            if questions:
-                form = Form(
+            if cached is not None:
+                # Known PDF: clone the cached questions instead of parsing it again
+                questions = json.loads(cached)
+                form = create_form_from_questions(
+                    questions,
                     title=f"Form from {filename}",
                     description="Automatically generated from PDF",
                     user_id=current_user.id,
                     company_id=session.get('referral_company_id')
                 )
-                db.session.add(form)
-                db.session.commit()
-                
-                # Update PDF upload with form ID
                 pdf_upload.form_id = form.id
-                
-                # Add questions to form
-                for i, q in enumerate(questions):
-                    question = Question(
-                        form_id=form.id,
-                        question_text=q['text'],
-                        question_type=q['type'],
-                        required=q['required'],
-                        order=i
-                    )
-                    if 'options' in q:
-                        question.set_options(q['options'])
-                    db.session.add(question)
-                
                 db.session.commit()
                 
                 # Clear referral from session after form creation
@@ -471,120 +2780,170 @@ def upload_pdf():
                 
                 flash('Form generated successfully!')
                 return redirect(url_for('edit_form', form_id=form.id))
-            else:
-                flash('No questions found in the PDF')
-                return redirect(url_for('upload_pdf'))
+            
+            job = ExtractionJob(
+                user_id=current_user.id,
+                pdf_upload_id=pdf_upload.id,
+                company_id=session.get('referral_company_id')
+            )
+            db.session.add(job)
+            db.session.commit()
+            
+            # Extract questions and create the form in the background
+            _, dispatcher = get_job_executors()
+            dispatcher.submit(run_extraction_job, job.id)
+            
+            # Clear referral from session; the job carries it to the new form
+            session.pop('referral_company_id', None)
+            
+            return redirect(url_for('upload_pdf', job=job.id))
     
-    return render_template('upload_pdf.html')
+    job = None
+    job_id = request.args.get('job', type=int)
+    if job_id:
+        job = db.session.get(ExtractionJob, job_id)
+        if job is None or job.user_id != current_user.id:
+            job = None
+        else:
+            expire_stale_job(job)
+    return render_template('upload_pdf.html', job=job)
 
-def parse_mindmap_to_form(mindmap_text):
-    form_data = {
-        "title": "",
-        "sections": []
-    }
-    
-    current_section = None
-    current_field = None
-    
-    lines = mindmap_text.split('\n')
-    for line in lines:
+@app.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    job = ExtractionJob.query.get_or_404(job_id)
+    if job.user_id != current_user.id:
+        return jsonify({'error': 'forbidden'}), 403
+    expire_stale_job(job)
+    return jsonify({
+        'id': job.id,
+        'status': job.status,
+        'error': job.error,
+        'form_id': job.form_id,
+        'redirect_url': url_for('edit_form', form_id=job.form_id) if job.form_id else None
+    })
+
+MINDMAP_TYPE_MAPPING = {
+    'text': 'text',
+    'email': 'email',
+    'dropdown': 'multiple_choice',
+    'checkbox': 'checkbox',
+    'radio': 'radio'
+}
+MINDMAP_CHOICE_TYPES = ('dropdown', 'checkbox', 'radio')
+MINDMAP_INSERT_BATCH = 1000
+
+def mindmap_indent_width(line):
+    whitespace = line[:len(line) - len(line.lstrip())]
+    return len(whitespace.expandtabs(8))
+
+def iter_mindmap_items(lines):
+    # Streams ('title', text) and ('field', label, field_type, options) items from mindmap
+    # lines. Nesting depth comes from an indentation stack, so any consistent indent
+    # (2 or 4 spaces, tabs, ...) works: title > section > field > option.
+    indent_stack = []
+    field = None
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        text = line.strip()
         # Skip empty lines
-        if not line.strip():
+        if not text:
             continue
-            
-        # Count indentation level (number of spaces at start)
-        indent_level = len(line) - len(line.lstrip())
-        
+
+        width = mindmap_indent_width(line)
+        dedented = False
+        while indent_stack and width < indent_stack[-1]:
+            indent_stack.pop()
+            dedented = True
+        if not indent_stack or width > indent_stack[-1]:
+            if dedented:
+                raise ValueError(f'Line {line_number}: indentation does not match any enclosing level')
+            indent_stack.append(width)
+        level = len(indent_stack) - 1
+
+        if level <= 2 and field is not None:
+            yield field
+            field = None
+
         # Root level - Form title
-        if indent_level == 0:
-            form_data["title"] = line.strip()
-            
-        # First level - Sections
-        elif indent_level == 2:  # Two spaces for sections
-            # Remove "Section X:" prefix if present
-            section_name = line.strip()
-            if ":" in section_name:
-                section_name = section_name.split(":", 1)[1].strip()
-            
-            current_section = {
-                "name": section_name,
-                "fields": []
-            }
-            form_data["sections"].append(current_section)
-            
-        # Second level - Fields
-        elif indent_level == 4:  # Four spaces for fields
-            field_parts = line.strip().split('|')
-            field_label = field_parts[0].strip()
-            field_type = "text"  # default type
-            
-            if len(field_parts) > 1:
-                type_spec = field_parts[1].strip().lower()
-                if type_spec in ['text', 'dropdown', 'checkbox', 'radio', 'email']:
-                    field_type = type_spec
-            
-            current_field = {
-                "label": field_label,
-                "type": field_type,
-                "options": []
-            }
-            current_section["fields"].append(current_field)
-            
+        if level == 0:
+            yield ('title', text)
+
+        # Second level - Fields ("Label | type"); sections only group them
+        elif level == 2:
+            field_parts = text.split('|')
+            field_type = field_parts[1].strip().lower() if len(field_parts) > 1 else 'text'
+            if field_type not in MINDMAP_TYPE_MAPPING:
+                field_type = 'text'
+            field = ('field', field_parts[0].strip(), field_type, [])
+
         # Third level - Options (for dropdown/checkbox/radio)
-        elif indent_level == 6 and current_field:  # Six spaces for options
-            if current_field["type"] in ['dropdown', 'checkbox', 'radio']:
-                current_field["options"].append(line.strip())
-    
-    return form_data
+        elif level == 3 and field is not None and field[2] in MINDMAP_CHOICE_TYPES:
+            field[3].append(text)
+
+    if field is not None:
+        yield field
+
+def import_mindmap(lines, user_id, company_id):
+    # Builds the form in one transaction, inserting questions in bulk batches so
+    # memory stays flat however many fields the mindmap has; the caller commits
+    form = None
+    batch = []
+    order = 0
+    for item in iter_mindmap_items(lines):
+        if item[0] == 'title':
+            if form is None:
+                form = Form(
+                    title=item[1],
+                    description="Generated from mindmap",
+                    user_id=user_id,
+                    company_id=company_id
+                )
+                db.session.add(form)
+                db.session.flush()
+            else:
+                form.title = item[1]
+            continue
+
+        _, label, field_type, options = item
+        question = {
+            'text': label,
+            'type': MINDMAP_TYPE_MAPPING[field_type],
+            'required': True,
+            'order': order
+        }
+        if field_type in MINDMAP_CHOICE_TYPES and options:
+            question['options'] = options
+        batch.append(question)
+        order += 1
+        if len(batch) >= MINDMAP_INSERT_BATCH:
+            insert_question_rows(form.id, batch)
+            batch = []
+
+    if form is None:
+        raise ValueError('The mindmap is empty')
+    insert_question_rows(form.id, batch)
+    return form
 
 @app.route('/upload_mindmap', methods=['GET', 'POST'])
 @login_required
 def upload_mindmap():
     if request.method == 'POST':
-        mindmap_text = request.form.get('mindmap_text')
-        if not mindmap_text:
-            flash('No mindmap text provided')
-            return redirect(request.url)
+        # Accept an uploaded file, a raw text/plain body or the pasted textarea
+        mindmap_file = request.files.get('mindmap_file')
+        if mindmap_file and mindmap_file.filename:
+            lines = io.TextIOWrapper(mindmap_file.stream, encoding='utf-8')
+        elif request.mimetype == 'text/plain':
+            lines = io.TextIOWrapper(request.stream, encoding='utf-8')
+        else:
+            mindmap_text = request.form.get('mindmap_text')
+            if not mindmap_text:
+                flash('No mindmap text provided')
+                return redirect(request.url)
+            lines = io.StringIO(mindmap_text)
             
         try:
-            form_data = parse_mindmap_to_form(mindmap_text)
-            
-            form = Form(
-                title=form_data["title"],
-                description="Generated from mindmap",
-                user_id=current_user.id,
-                company_id=session.get('referral_company_id')
-            )
-            db.session.add(form)
-            db.session.commit()
-            
-            order = 0
-            for section in form_data["sections"]:
-                for field in section["fields"]:
-                    type_mapping = {
-                        'text': 'text',
-                        'email': 'email',
-                        'dropdown': 'multiple_choice',
-                        'checkbox': 'checkbox',
-                        'radio': 'radio'
-                    }
-                    
-                    question_type = type_mapping.get(field["type"], 'text')
-                    
-                    question = Question(
-                        form_id=form.id,
-                        question_text=field["label"],
-                        question_type=question_type,
-                        required=True,
-                        order=order
-                    )
-                    
-                    if question_type in ['multiple_choice', 'checkbox', 'radio'] and field["options"]:
-                        question.set_options(field["options"])
-                    
-                    db.session.add(question)
-                    order += 1
-            
+            form = import_mindmap(lines, current_user.id, session.get('referral_company_id'))
             db.session.commit()
             
             # Clear referral from session after form creation
@@ -594,6 +2953,7 @@ def upload_mindmap():
             return redirect(url_for('edit_form', form_id=form.id))
             
         except Exception as e:
+            db.session.rollback()
             flash(f'Error processing mindmap: {str(e)}')
             return redirect(url_for('upload_mindmap'))
     
@@ -617,19 +2977,267 @@ def manage_companies():
         return redirect(url_for('manage_companies'))
         
     companies = Company.query.all()
-    return render_template('manage_companies.html', companies=companies)
+    clicks = dict(db.session.execute(
+        db.select(ReferralClick.company_id, db.func.sum(ReferralClick.count))
+        .group_by(ReferralClick.company_id)
+    ).all())
+    return render_template('manage_companies.html', companies=companies, clicks=clicks)
+
+REFERRAL_MAP = 'referral_map'
+
+@db.event.listens_for(db.session, 'before_flush')
+def bump_referral_map_version(session, flush_context, instances):
+    # Any company write moves the shared version so every worker reloads its map
+    changed = [obj for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+               if isinstance(obj, Company) and (obj not in session.dirty or session.is_modified(obj))]
+    if not changed:
+        return
+    stmt = upsert_insert(CacheVersion).values(name=REFERRAL_MAP, version=1)
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=['name'], set_={'version': CacheVersion.version + 1}))
+    session.info['referral_map_changed'] = True
+
+@db.event.listens_for(db.session, 'after_commit')
+def reload_referral_map(session):
+    if session.info.pop('referral_map_changed', False):
+        referral_resolver.invalidate()
+
+@db.event.listens_for(db.session, 'after_rollback')
+def forget_referral_map_change(session):
+    session.info.pop('referral_map_changed', None)
+
+class ReferralResolver:
+    # referral_code -> company_id, held in memory. A lookup costs one primary-key
+    # read of the shared version every REFERRAL_MAP_CHECK_SECONDS at most, and a
+    # full reload only when another request (in any worker) changed a company.
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self.codes = {}
+        self.version = None
+        self.next_check = 0.0
+        self.lock = threading.Lock()
+
+    def resolve(self, referral_code):
+        if time.monotonic() >= self.next_check:
+            self._refresh()
+        return self.codes.get(referral_code)
+
+    def _refresh(self):
+        with self.lock:
+            if time.monotonic() < self.next_check:
+                return  # another thread refreshed while we waited
+            version = db.session.scalar(
+                db.select(CacheVersion.version).where(CacheVersion.name == REFERRAL_MAP)
+            ) or 0
+            if version != self.version:
+                # Swap in a new dict so readers never see a half-built map
+                self.codes = dict(db.session.execute(db.select(Company.referral_code, Company.id)).all())
+                self.version = version
+            self.next_check = time.monotonic() + self.check_interval
+
+    def invalidate(self):
+        self.next_check = 0.0
+
+referral_resolver = ReferralResolver(app.config['REFERRAL_MAP_CHECK_SECONDS'])
+
+class ReferralClickBuffer:
+    # Counts clicks per (company, day) in memory; a background thread adds them
+    # to referral_click in one upsert per flush instead of one write per hit.
+
+    def __init__(self, app, flush_seconds):
+        self.app = app
+        self.flush_seconds = flush_seconds
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='referral-clicks', daemon=True)
+        self.thread.start()
+
+    def record(self, company_id):
+        with self.lock:
+            self.counts[(company_id, datetime.utcnow().date())] += 1
+
+    def _run(self):
+        while not self.stopping.wait(self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        if not counts:
+            return
+        with self.app.app_context():
+            try:
+                stmt = upsert_insert(ReferralClick)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=['company_id', 'day'],
+                    set_={'count': ReferralClick.count + stmt.excluded['count']}
+                )
+                db.session.execute(stmt, [
+                    {'company_id': company_id, 'day': day, 'count': n}
+                    for (company_id, day), n in counts.items()
+                ])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                # Keep the counts for the next flush rather than losing them
+                with self.lock:
+                    self.counts.update(counts)
+                self.app.logger.exception('Could not record %d referral clicks', sum(counts.values()))
+            finally:
+                db.session.remove()
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+        self.flush()
+
+_click_buffer = None
+_click_buffer_lock = threading.Lock()
+
+def get_click_buffer():
+    global _click_buffer
+    with _click_buffer_lock:
+        if _click_buffer is None:
+            _click_buffer = ReferralClickBuffer(app, app.config['REFERRAL_CLICK_FLUSH_SECONDS'])
+            atexit.register(_click_buffer.stop)
+    return _click_buffer
 
 @app.route('/referral/<referral_code>')
 def handle_referral(referral_code):
-    company = Company.query.filter_by(referral_code=referral_code).first()
-    if not company:
+    company_id = referral_resolver.resolve(referral_code)
+    if company_id is None:
         flash('Invalid referral link')
         return redirect(url_for('index'))
-        
+    
+    get_click_buffer().record(company_id)
     # Store company_id in session for form creation
-    session['referral_company_id'] = company.id
+    session['referral_company_id'] = company_id
     return redirect(url_for('create_form'))
 
+@app.cli.command('rebuild-tallies')
+@click.option('--form-id', type=int, default=None, help='Only rebuild the tallies of this form.')
+@click.option('--check', is_flag=True, help='Report counters that disagree with the raw answers without rewriting them.')
+def rebuild_tallies_command(form_id, check):
+    """Backfill or verify answer tallies from the raw Answer rows."""
+    expected = count_raw_answers(form_id)
+    stored = stored_tallies(form_id)
+    mismatches = {key for key in expected.keys() | stored.keys() if expected[key] != stored[key]}
+    for key in sorted(mismatches, key=str):
+        click.echo(f'form={key[0]} question={key[1]} company={key[2]} option={key[3]!r}: '
+                   f'stored={stored[key]} expected={expected[key]}')
+    if check:
+        click.echo(f'{len(mismatches)} mismatched counters')
+        raise SystemExit(1 if mismatches else 0)
+
+    query = AnswerTally.query
+    if form_id is not None:
+        query = query.filter_by(form_id=form_id)
+    query.delete()
+    bump_tallies(expected)
+    db.session.commit()
+    click.echo(f'Rebuilt {len(expected)} counters ({len(mismatches)} were out of date)')
+
+@app.cli.command('compact-rollups')
+@click.option('--rebuild', is_flag=True, help='Recount the rollups from the raw responses before compacting.')
+@click.option('--form-id', type=int, default=None, help='With --rebuild, only rebuild this form.')
+def compact_rollups_command(rebuild, form_id):
+    """Drop expired hourly response rollups, optionally rebuilding them first."""
+    cutoff = hourly_rollup_cutoff()
+    if rebuild:
+        query = (db.select(Response.form_id, Response.company_id, Response.submitted_at)
+                 .execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if form_id is not None:
+            query = query.where(Response.form_id == form_id)
+        expected = rollup_increments(db.session.execute(query), hourly_since=cutoff)
+        stale = ResponseRollup.query
+        if form_id is not None:
+            stale = stale.filter_by(form_id=form_id)
+        stale.delete()
+        bump_rollups(expected)
+        click.echo(f'Rebuilt {len(expected)} rollup buckets')
+    pruned = ResponseRollup.query.filter(
+        ResponseRollup.granularity == 'hour',
+        ResponseRollup.bucket < cutoff
+    ).delete()
+    db.session.commit()
+    click.echo(f'Dropped {pruned} hourly buckets before {cutoff:%Y-%m-%d %H:%M}')
+
+@app.cli.command('rebuild-search')
+@click.option('--form-id', type=int, default=None, help='Only reindex the responses of this form.')
+def rebuild_search_command(form_id):
+    """Rebuild the full-text search index from the stored responses."""
+    if not search_index_enabled():
+        click.echo('Full-text search needs SQLite FTS5; other databases use a LIKE scan instead')
+        raise SystemExit(1)
+    db.session.execute(db.text(SEARCH_TABLE_DDL))
+    form_ids = [form_id] if form_id is not None else db.session.scalars(db.select(Form.id).order_by(Form.id)).all()
+    indexed = 0
+    for current_form_id in form_ids:
+        for statement in unindex_form_statements(current_form_id):
+            db.session.execute(statement)
+        # Same filter and order as iter_response_rows, so the two cursors line up
+        company_ids = db.session.execute(
+            db.select(Response.company_id).where(Response.form_id == current_form_id)
+            .order_by(Response.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        batch = []
+        for (response_id, _, _, answers), (company_id,) in zip(iter_response_rows(current_form_id), company_ids):
+            batch.append((response_id, current_form_id, company_id, '\n'.join(answers.values())))
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                index_responses(batch)
+                indexed += len(batch)
+                batch = []
+        index_responses(batch)
+        indexed += len(batch)
+        db.session.commit()
+    db.session.execute(db.text("INSERT INTO response_search (response_search) VALUES ('optimize')"))
+    db.session.commit()
+    click.echo(f'Indexed {indexed} responses from {len(form_ids)} forms')
+
+@app.cli.command('refresh-snapshots')
+@click.option('--form-id', type=int, default=None, help='Only refresh this form\'s snapshot.')
+@click.option('--rebuild', is_flag=True, help='Rewrite the snapshots instead of appending new responses.')
+def refresh_snapshots_command(form_id, rebuild):
+    """Bring the columnar analytics snapshots up to date."""
+    if not snapshots_enabled():
+        click.echo('Snapshots need numpy: pip install numpy')
+        raise SystemExit(1)
+    form_ids = [form_id] if form_id is not None else db.session.scalars(db.select(Form.id).order_by(Form.id)).all()
+    refreshed = rows = 0
+    for current_form_id in form_ids:
+        meta = refresh_snapshot(current_form_id, rebuild=rebuild)
+        if meta is None:
+            click.echo(f'Form {current_form_id}: another process is refreshing it, skipped')
+            continue
+        refreshed += 1
+        rows += meta['rows']
+    click.echo(f'Refreshed {refreshed} snapshots holding {rows} responses')
+
+@app.cli.command('dedup-uploads')
+def dedup_uploads_command():
+    """Move PDFs uploaded before content addressing into the blob store."""
+    upload_folder = app.config['UPLOAD_FOLDER']
+    moved = duplicates = missing = 0
+    for pdf_upload in PDFUpload.query.filter(PDFUpload.blob_id.is_(None)).all():
+        legacy_path = os.path.join(upload_folder, pdf_upload.filename)
+        if not os.path.exists(legacy_path):
+            missing += 1
+            continue
+        with open(legacy_path, 'rb') as legacy_file:
+            digest, size, relative_path = store_upload_stream(legacy_file)
+        blob = acquire_blob(digest, size, relative_path)
+        pdf_upload.blob_id = blob.id
+        pdf_upload.filename = blob.path
+        db.session.commit()
+        if blob.ref_count > 1:
+            duplicates += 1
+        else:
+            moved += 1
+        os.remove(legacy_path)
+    click.echo(f'{moved} stored, {duplicates} deduplicated, {missing} missing on disk')
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
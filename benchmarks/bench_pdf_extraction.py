@@ -0,0 +1,94 @@
+"""PDF question-extraction benchmark and golden-output regression check.
+
+Runs the PDF parser over every distinct PDF under uploads/ (legacy flat
+files and the content-addressed store alike). It times PyPDF2 text
+extraction separately from question parsing, then compares the questions
+found against benchmarks/golden/pdf_questions.json.
+
+    python benchmarks/bench_pdf_extraction.py              # benchmark + check
+    python benchmarks/bench_pdf_extraction.py --update-golden
+
+Exits non-zero when the extracted questions differ from the golden file.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import PyPDF2  # noqa: E402
+from app import parse_page_questions  # noqa: E402
+
+GOLDEN_PATH = os.path.join(ROOT, 'benchmarks', 'golden', 'pdf_questions.json')
+
+
+def corpus(upload_dir):
+    # {sha256: path}, one entry per distinct file
+    files = {}
+    for path in sorted(glob.glob(os.path.join(upload_dir, '**', '*.pdf'), recursive=True)):
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        files.setdefault(digest, path)
+    return files
+
+
+def page_texts(path):
+    with open(path, 'rb') as f:
+        return [page.extract_text() for page in PyPDF2.PdfReader(f).pages]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uploads', default=os.path.join(ROOT, 'uploads'))
+    parser.add_argument('--repeat', type=int, default=200, help='parse passes over the extracted text')
+    parser.add_argument('--update-golden', action='store_true')
+    args = parser.parse_args()
+
+    files = corpus(args.uploads)
+    start = time.perf_counter()
+    texts = {digest: page_texts(path) for digest, path in files.items()}
+    extract_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        results = {digest: [q for text in pages for q in parse_page_questions(text)]
+                   for digest, pages in texts.items()}
+    parse_ms = (time.perf_counter() - start) * 1000 / args.repeat
+
+    pages = sum(len(p) for p in texts.values())
+    questions = sum(len(q) for q in results.values())
+    print(f'{len(files)} distinct PDFs, {pages} pages, {questions} questions')
+    print(f'PyPDF2 text extraction: {extract_ms:8.2f} ms')
+    print(f'question parsing:       {parse_ms:8.3f} ms per pass ({args.repeat} passes)')
+
+    golden = {digest: {'file': os.path.basename(files[digest]), 'questions': found}
+              for digest, found in results.items()}
+    if args.update_golden:
+        with open(GOLDEN_PATH, 'w') as f:
+            json.dump(golden, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write('\n')
+        print(f'Wrote {GOLDEN_PATH}')
+        return 0
+
+    with open(GOLDEN_PATH) as f:
+        expected = json.load(f)
+    failures = 0
+    for digest, entry in sorted(golden.items()):
+        if digest not in expected:
+            print(f'NEW      {entry["file"]} (not in golden file)')
+        elif expected[digest]['questions'] != entry['questions']:
+            failures += 1
+            print(f'CHANGED  {entry["file"]}')
+            print(f'  expected: {json.dumps(expected[digest]["questions"], ensure_ascii=False)}')
+            print(f'  got:      {json.dumps(entry["questions"], ensure_ascii=False)}')
+    print('golden check: ' + ('OK' if not failures else f'{failures} PDFs changed'))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
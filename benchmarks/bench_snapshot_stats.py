@@ -0,0 +1,126 @@
+"""Benchmark for the columnar response snapshots behind /api/forms/<id>/statistics.
+
+Seeds a scratch SQLite database with one form of mixed question types and
+10k/100k/1M responses, then compares option counts computed by decoding every
+answer row (what pulling a form through view_responses or an export costs)
+with the same counts read from a memory-mapped snapshot. Also times the full
+snapshot build and an incremental refresh after 1% more responses arrive.
+
+    python benchmarks/bench_snapshot_stats.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix='forms_bench_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(SCRATCH_DIR, 'bench.db')
+os.environ['SNAPSHOT_FOLDER'] = os.path.join(SCRATCH_DIR, 'snapshots')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import (app, db, User, Company, Form, Question, Response, Answer,  # noqa: E402
+                 encode_answer, iter_response_rows, load_snapshot, option_positions,
+                 refresh_snapshot, snapshot_statistics, snapshots_enabled)
+
+QUESTION_TYPES = ['radio', 'checkbox', 'number', 'text']
+CHOICES = ['Red', 'Green', 'Blue', 'Other']
+POSITIONS = option_positions(CHOICES)
+
+
+def answer_values(rng, question_type, response_id):
+    if question_type == 'radio':
+        return [rng.choice(CHOICES)]
+    if question_type == 'checkbox':
+        return sorted(rng.sample(CHOICES, rng.randint(1, 3)), key=CHOICES.index)
+    if question_type == 'number':
+        return [str(rng.randint(0, 100))]
+    return [f'answer {response_id}']
+
+
+def add_responses(form_id, questions, companies, first_id, count, rng):
+    for start in range(first_id, first_id + count, 50000):
+        ids = range(start, min(start + 50000, first_id + count))
+        db.session.execute(db.insert(Response), [
+            {'id': i, 'form_id': form_id, 'company_id': rng.choice(companies)} for i in ids
+        ])
+        db.session.execute(db.insert(Answer), [
+            {'response_id': i, 'question_id': question_id,
+             **encode_answer(question_type, POSITIONS, answer_values(rng, question_type, i))}
+            for i in ids for question_id, question_type in questions
+        ])
+        db.session.commit()
+
+
+def seed(response_count, rng):
+    db.drop_all()
+    db.create_all()
+    user = User(email='bench@example.com')
+    user.set_password('bench')
+    companies = [Company(name=f'Company {i}', referral_code=f'BENCH{i}') for i in range(5)]
+    db.session.add(user)
+    db.session.add_all(companies)
+    db.session.commit()
+
+    form = Form(title='Benchmark form', user_id=user.id)
+    db.session.add(form)
+    db.session.commit()
+    questions = []
+    for i, question_type in enumerate(QUESTION_TYPES * 2):
+        question = Question(form_id=form.id, question_text=f'Question {i}', question_type=question_type, order=i)
+        if question_type in ('radio', 'checkbox'):
+            question.set_options(CHOICES)
+        questions.append(question)
+    db.session.add_all(questions)
+    db.session.commit()
+    questions = [(question.id, question.question_type) for question in questions]
+    company_ids = [company.id for company in companies] + [None]
+    add_responses(form.id, questions, company_ids, 1, response_count, rng)
+    return form.id, questions, company_ids
+
+
+def decoded_counts(form_id):
+    # The row-at-a-time baseline: decode every answer, then count choices in Python
+    counts = Counter()
+    for _, _, _, answers in iter_response_rows(form_id):
+        for question_id, answer in answers.items():
+            for value in answer.split(', '):
+                counts[question_id, value] += 1
+    return counts
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+    if not snapshots_enabled():
+        raise SystemExit('numpy is not installed')
+
+    print(f"{'responses':>10} {'decode (ms)':>12} {'build (ms)':>11} {'refresh 1% (ms)':>16} "
+          f"{'stats (ms)':>11} {'snapshot MB':>12}")
+    for size in args.sizes:
+        rng = random.Random(size)
+        with app.app_context():
+            form_id, questions, company_ids = seed(size, rng)
+            _, decode_ms = timed(decoded_counts, form_id)
+            _, build_ms = timed(refresh_snapshot, form_id, True)
+            add_responses(form_id, questions, company_ids, size + 1, max(size // 100, 1), rng)
+            _, refresh_ms = timed(refresh_snapshot, form_id)
+            snapshot = load_snapshot(form_id)
+            _, stats_ms = timed(snapshot_statistics, snapshot)
+            directory = os.path.join(app.config['SNAPSHOT_FOLDER'], f'form_{form_id}')
+            megabytes = sum(entry.stat().st_size for entry in os.scandir(directory)) / 1e6
+        print(f'{size:>10} {decode_ms:>12.1f} {build_ms:>11.1f} {refresh_ms:>16.1f} '
+              f'{stats_ms:>11.1f} {megabytes:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
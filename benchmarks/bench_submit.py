@@ -0,0 +1,103 @@
+"""Submission throughput benchmark: synchronous vs. write-behind ingest.
+
+Fires concurrent POST /form/<id>/submit requests from several threads
+against a scratch SQLite database and reports submissions per second for
+each ingest configuration.
+
+    python benchmarks/bench_submit.py [--submissions 2000] [--threads 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix='forms_bench_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(SCRATCH_DIR, 'bench.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as forms_app  # noqa: E402
+from app import app, db, User, Form, Question, Response, Answer  # noqa: E402
+
+CONFIGURATIONS = [
+    ('sync', 'commit'),
+    ('queued', 'commit'),
+    ('queued', 'enqueue'),
+]
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    user = User(email='bench@example.com')
+    user.set_password('bench')
+    db.session.add(user)
+    db.session.commit()
+    form = Form(title='Benchmark form', user_id=user.id)
+    db.session.add(form)
+    db.session.commit()
+    questions = [
+        Question(form_id=form.id, question_text='Name', question_type='text', order=0),
+        Question(form_id=form.id, question_text='Colour', question_type='radio', order=1),
+        Question(form_id=form.id, question_text='Hobbies', question_type='checkbox', order=2),
+    ]
+    questions[1].set_options(['Red', 'Green', 'Blue'])
+    questions[2].set_options(['Reading', 'Sports', 'Music'])
+    db.session.add_all(questions)
+    db.session.commit()
+    return form.id, [q.id for q in questions]
+
+
+def run(form_id, question_ids, submissions, thread_count):
+    errors = []
+    per_thread = submissions // thread_count
+
+    def worker(offset):
+        client = app.test_client()
+        for i in range(per_thread):
+            result = client.post(f'/form/{form_id}/submit', data={
+                f'question_{question_ids[0]}': f'respondent {offset + i}',
+                f'question_{question_ids[1]}': 'Green',
+                f'question_{question_ids[2]}': ['Reading', 'Music'],
+            })
+            if result.status_code != 302:
+                errors.append(result.status_code)
+
+    threads = [threading.Thread(target=worker, args=(n * per_thread,)) for n in range(thread_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if forms_app._ingestor is not None:
+        # Include the time to drain anything still queued
+        forms_app._ingestor.stop()
+        forms_app._ingestor = None
+    elapsed = time.perf_counter() - start
+    return per_thread * thread_count, elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--submissions', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    app.config['TESTING'] = True
+    print(f"{'mode':>8} {'durability':>10} {'submissions':>12} {'seconds':>8} {'subs/sec':>9} {'saved':>6}")
+    for mode, durability in CONFIGURATIONS:
+        app.config['INGEST_MODE'] = mode
+        app.config['INGEST_DURABILITY'] = durability
+        with app.app_context():
+            form_id, question_ids = seed()
+        sent, elapsed, errors = run(form_id, question_ids, args.submissions, args.threads)
+        with app.app_context():
+            saved = db.session.scalar(db.select(db.func.count(Response.id)))
+            assert db.session.scalar(db.select(db.func.count(Answer.id))) == saved * 3
+        print(f'{mode:>8} {durability:>10} {sent:>12} {elapsed:>8.2f} {sent / elapsed:>9.0f} {saved:>6}'
+              + (f'  ({len(errors)} errors)' if errors else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Render-time benchmark for the view_responses page.
+
+Seeds a scratch SQLite database with one form of mixed question types and
+1k/10k/100k responses, then times the full GET /form/<id>/responses request
+and the answer-grid pivot on its own.
+
+    python benchmarks/bench_view_responses.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+SCRATCH_DIR = tempfile.mkdtemp(prefix='forms_bench_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(SCRATCH_DIR, 'bench.db')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, User, Company, Form, Question, Response, Answer, build_response_grid  # noqa: E402
+
+QUESTION_COUNT = 10
+CHOICES = ['Red', 'Green', 'Blue', 'Other']
+
+
+def seed(response_count):
+    db.drop_all()
+    db.create_all()
+    user = User(email='bench@example.com')
+    user.set_password('bench')
+    companies = [Company(name=f'Company {i}', referral_code=f'BENCH{i}') for i in range(5)]
+    db.session.add(user)
+    db.session.add_all(companies)
+    db.session.commit()
+
+    form = Form(title='Benchmark form', user_id=user.id)
+    db.session.add(form)
+    db.session.commit()
+    questions = []
+    for i in range(QUESTION_COUNT):
+        question = Question(form_id=form.id, question_text=f'Question {i}',
+                            question_type='radio' if i % 2 else 'text', order=i)
+        if i % 2:
+            question.set_options(CHOICES)
+        questions.append(question)
+    db.session.add_all(questions)
+    db.session.commit()
+
+    rng = random.Random(response_count)
+    db.session.execute(db.insert(Response), [
+        {'id': i, 'form_id': form.id, 'company_id': rng.choice(companies).id}
+        for i in range(1, response_count + 1)
+    ])
+    db.session.execute(db.insert(Answer), [
+        {'response_id': i, 'question_id': q.id,
+         'answer_text': rng.choice(CHOICES) if q.question_type == 'radio' else f'answer {i}'}
+        for i in range(1, response_count + 1) for q in questions
+    ])
+    db.session.commit()
+    return form.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app.config['TESTING'] = True
+    print(f"{'responses':>10} {'grid (ms)':>10} {'request (ms)':>13} {'bytes':>12}")
+    for size in args.sizes:
+        with app.app_context():
+            form_id = seed(size)
+            response_ids = [row[0] for row in db.session.execute(db.select(Response.id))]
+            start = time.perf_counter()
+            build_response_grid(form_id, response_ids)
+            grid_ms = (time.perf_counter() - start) * 1000
+
+        client = app.test_client()
+        client.post('/login', data={'email': 'bench@example.com', 'password': 'bench'})
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = client.get(f'/form/{form_id}/responses')
+            timings.append((time.perf_counter() - start) * 1000)
+            assert result.status_code == 200, result.status_code
+        print(f'{size:>10} {grid_ms:>10.1f} {min(timings):>13.1f} {len(result.data):>12}')
+
+
+if __name__ == '__main__':
+    main()
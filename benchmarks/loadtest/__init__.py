@@ -0,0 +1,19 @@
+"""Reproducible load tests: seed a synthetic dataset, drive scenarios, compare runs.
+
+    python -m benchmarks.loadtest seed --responses 1000000
+    python -m benchmarks.loadtest run --out before.json
+    # ...change the code, then reseed so both runs see the same rows
+    python -m benchmarks.loadtest seed --responses 1000000
+    python -m benchmarks.loadtest run --out after.json
+    python -m benchmarks.loadtest compare before.json after.json
+
+Both ``seed`` and ``run`` use LOADTEST_DATABASE_URL (default: a SQLite file
+in the system temp directory), never the app's own database; uploaded PDFs
+and snapshots go to LOADTEST_FILES_DIR (default: also under the temp
+directory), which ``seed`` empties. The upload scenario posts the PDFs listed
+in benchmarks/golden/pdf_questions.json. ``run`` drives the app in-process
+through the Flask test client, or a running server with ``--base-url``
+(which must be serving the seeded database). ``compare`` exits non-zero
+when a percentile or the throughput of any scenario got worse by more than
+``--threshold``.
+"""
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DATABASE_URL = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'forms_loadtest.db')
+# Uploaded PDFs and analytics snapshots written during a run, kept out of the working tree
+DEFAULT_FILES_DIR = os.path.join(tempfile.gettempdir(), 'forms_loadtest_files')
+
+
+def main():
+    from benchmarks.loadtest import __doc__ as usage
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.loadtest', description=usage.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help='recreate the load-test database with synthetic data')
+    seed_parser.add_argument('--users', type=int, default=10)
+    seed_parser.add_argument('--companies', type=int, default=20)
+    seed_parser.add_argument('--forms-per-user', type=int, default=5)
+    seed_parser.add_argument('--questions-per-form', type=int, default=8)
+    seed_parser.add_argument('--responses', type=int, default=100000)
+    seed_parser.add_argument('--seed', type=int, default=0)
+
+    run_parser = commands.add_parser('run', help='run scenarios and write a result file')
+    run_parser.add_argument('--scenarios', nargs='+', default=None,
+                            help='subset of: view_form submit_burst view_responses search_responses dashboard upload_pdf')
+    run_parser.add_argument('--iterations', type=int, default=200, help='measured requests per scenario')
+    run_parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per scenario')
+    run_parser.add_argument('--concurrency', type=int, default=None, help='override every scenario\'s thread count')
+    run_parser.add_argument('--base-url', default=None, help='drive a running server instead of the test client')
+    run_parser.add_argument('--out', default=None, help='write the results as JSON')
+
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='relative change counted as a regression (default 0.10)')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        from benchmarks.loadtest.report import compare
+        sys.exit(1 if compare(args.baseline, args.candidate, args.threshold) else 0)
+
+    # Must be set before the app module is imported
+    os.environ['DATABASE_URL'] = os.environ.get('LOADTEST_DATABASE_URL', DEFAULT_DATABASE_URL)
+    files_dir = os.environ.get('LOADTEST_FILES_DIR', DEFAULT_FILES_DIR)
+    if args.command == 'seed':
+        shutil.rmtree(files_dir, ignore_errors=True)  # blob rows are recreated with the database
+    os.environ['UPLOAD_FOLDER'] = os.path.join(files_dir, 'uploads')
+    os.environ['SNAPSHOT_FOLDER'] = os.path.join(files_dir, 'snapshots')
+    sys.path.insert(0, REPO_ROOT)
+    from app import app
+
+    if args.command == 'seed':
+        from benchmarks.loadtest.seed import seed
+        with app.app_context():
+            dataset = seed(users=args.users, companies=args.companies, forms_per_user=args.forms_per_user,
+                           questions_per_form=args.questions_per_form, responses=args.responses,
+                           random_seed=args.seed)
+        print(f"Seeded {os.environ['DATABASE_URL']}: {json.dumps(dataset)}")
+        return
+
+    from benchmarks.loadtest.driver import SCENARIOS, load_targets, run_scenario, session_factory
+    from benchmarks.loadtest.report import build_report, print_summary, summarise
+    from app import db, User, Form, Response, Answer
+
+    with app.app_context():
+        dataset = {model.__tablename__: db.session.scalar(db.select(db.func.count()).select_from(model))
+                   for model in (User, Form, Response, Answer)}
+    targets = load_targets()
+    make_session = session_factory(args.base_url)
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        if name not in SCENARIOS:
+            parser.error(f'unknown scenario {name!r}')
+        run = run_scenario(name, targets, make_session, args.iterations, args.warmup, args.concurrency)
+        if run is None:
+            print(f'{name}: skipped (none of the PDFs in benchmarks/golden/pdf_questions.json were found)',
+                  file=sys.stderr)
+            continue
+        results[name] = summarise(run)
+
+    settings = {'iterations': args.iterations, 'warmup': args.warmup, 'concurrency': args.concurrency,
+                'transport': 'http' if args.base_url else 'test_client',
+                'ingest_mode': app.config['INGEST_MODE'], 'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]}
+    report = build_report(results, dataset, settings, REPO_ROOT)
+    print_summary(report)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Wrote {args.out}')
+
+
+if __name__ == '__main__':
+    main()
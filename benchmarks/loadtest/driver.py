@@ -0,0 +1,301 @@
+"""Drive load-test scenarios through the Flask test client or a live server.
+
+Each scenario runs a fixed number of requests (after a warm-up that is not
+measured) from ``concurrency`` worker threads, each with its own session.
+Request targets are picked with per-worker seeded RNGs, so two runs against
+the same seeded database send the same requests. A request counts as an error
+unless its scenario's success check passes (the page, flash or redirect the
+app answers with when the action really worked).
+"""
+import base64
+import hashlib
+import http.cookiejar
+import io
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+import zlib
+
+from app import app, db, ExtractionJob, Form, Question, Response, JOB_ACTIVE_STATUSES
+
+from .seed import CHOICES, PASSWORD, answer_for, user_email
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+GOLDEN_PDFS = os.path.join(REPO_ROOT, 'benchmarks', 'golden', 'pdf_questions.json')
+HOT_FORMS = 5
+UPLOAD_SAMPLES = 5
+PRIME_TIMEOUT_SECONDS = 120
+
+
+def decode_flashes(cookie_value):
+    # Flask keeps flashed messages in the signed session cookie; the payload can be
+    # read without the secret key (a leading '.' marks it as zlib-compressed)
+    if not cookie_value:
+        return []
+    payload = cookie_value.lstrip('.').split('.')[0]
+    data = base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))
+    if cookie_value.startswith('.'):
+        data = zlib.decompress(data)
+    return [flashed[' t'][1] if isinstance(flashed, dict) else flashed[1]
+            for flashed in json.loads(data).get('_flashes', [])]
+
+
+class TestClientSession:
+    def __init__(self):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, files=None):
+        # Returns (status, redirect location)
+        if files:
+            data = dict(data or {})
+            for name, (filename, content) in files.items():
+                data[name] = (io.BytesIO(content), filename)
+        response = self.client.open(path, method=method, data=data)
+        response.get_data()
+        response.close()
+        return response.status_code, response.headers.get('Location')
+
+    def flashes(self):
+        cookie = self.client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+        return decode_flashes(cookie.value if cookie else None)
+
+    def reset(self):
+        self.client.delete_cookie(app.config['SESSION_COOKIE_NAME'])
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPSession:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+    def request(self, method, path, data=None, files=None):
+        # Returns (status, redirect location)
+        headers = {}
+        body = None
+        if files:
+            body, content_type = encode_multipart(data or {}, files)
+            headers['Content-Type'] = content_type
+        elif data is not None:
+            body = urllib.parse.urlencode(data, doseq=True).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(req) as response:
+                response.read()
+                return response.status, response.headers.get('Location')
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get('Location')
+
+    def flashes(self):
+        return decode_flashes(next((cookie.value for cookie in self.cookies
+                                    if cookie.name == app.config['SESSION_COOKIE_NAME']), None))
+
+    def reset(self):
+        self.cookies.clear()
+
+
+def encode_multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def load_targets():
+    # The busiest forms, their questions and owners, read from the seeded database
+    with app.app_context():
+        hot = db.session.execute(
+            db.select(Form.id, Form.user_id)
+            .join(Response, Response.form_id == Form.id)
+            .group_by(Form.id, Form.user_id)
+            .order_by(db.func.count(Response.id).desc(), Form.id)
+            .limit(HOT_FORMS)
+        ).all()
+        if not hot:
+            raise SystemExit('The load-test database has no responses; run `seed` first.')
+        forms = []
+        for form_id, user_id in hot:
+            questions = db.session.execute(
+                db.select(Question.id, Question.question_type)
+                .where(Question.form_id == form_id).order_by(Question.order)
+            ).all()
+            forms.append({'id': form_id, 'owner': user_email(user_id), 'questions': questions})
+    return {'forms': forms, 'pdfs': load_sample_pdfs()}
+
+
+def load_sample_pdfs():
+    # The fixed corpus of the PDF golden file, looked up by digest in the repo's uploads/
+    # either as the original flat file or at its content-addressed path after dedup-uploads.
+    # Only PDFs with questions: the others never produce a form.
+    with open(GOLDEN_PDFS) as golden_file:
+        golden = json.load(golden_file)
+    pdfs = []
+    for digest, entry in sorted(golden.items()):
+        if not entry['questions']:
+            continue
+        for path in (os.path.join(REPO_ROOT, 'uploads', entry['file']),
+                     os.path.join(REPO_ROOT, 'uploads', digest[:2], digest[2:4], f'{digest}.pdf')):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as pdf_file:
+                content = pdf_file.read()
+            if hashlib.sha256(content).hexdigest() == digest:
+                pdfs.append((entry['file'], content))
+                break
+        if len(pdfs) == UPLOAD_SAMPLES:
+            break
+    return pdfs
+
+
+def submission_data(rng, form):
+    data = {}
+    for question_id, question_type in form['questions']:
+        data[f'question_{question_id}'] = answer_for(rng, question_type, rng.randint(1, 10 ** 6))
+    return data
+
+
+def view_form(rng, targets):
+    return 'GET', f"/form/{rng.choice(targets['forms'])['id']}", None, None
+
+
+def submit_burst(rng, targets):
+    form = rng.choice(targets['forms'])
+    return 'POST', f"/form/{form['id']}/submit", submission_data(rng, form), None
+
+
+def view_responses(rng, targets):
+    return 'GET', f"/form/{targets['forms'][0]['id']}/responses", None, None
+
+
+def search_responses(rng, targets):
+    query = urllib.parse.quote(rng.choice(CHOICES).lower()[:rng.randint(2, 5)])
+    return 'GET', f"/form/{targets['forms'][0]['id']}/responses?q={query}", None, None
+
+
+def dashboard(rng, targets):
+    return 'GET', '/dashboard', None, None
+
+
+def upload_pdf(rng, targets):
+    # Repeated uploads of the same files exercise the content-addressed fast path
+    return 'POST', '/upload_pdf', None, {'pdf': rng.choice(targets['pdfs'])}
+
+
+# Success checks, called with (session, status, redirect location). Failures are
+# often a redirect plus a flash too, so the status code alone proves nothing.
+def page_loaded(session, status, location):
+    return status == 200
+
+
+def submission_saved(session, status, location):
+    flashes = session.flashes()
+    session.reset()  # anonymous session: drop the flash so the cookie does not grow
+    return status == 302 and flashes == ['Form submitted successfully!']
+
+
+def upload_accepted(session, status, location):
+    # A new form from the cached extraction, or a queued extraction job
+    path = urllib.parse.urlsplit(location or '')
+    return status == 302 and (path.path.endswith('/edit') or path.query.startswith('job='))
+
+
+# name -> (request builder, success check, logs in as the busiest form's owner, default concurrency)
+SCENARIOS = {
+    'view_form': (view_form, page_loaded, False, 4),
+    'submit_burst': (submit_burst, submission_saved, False, 8),
+    'view_responses': (view_responses, page_loaded, True, 2),
+    'search_responses': (search_responses, page_loaded, True, 2),
+    'dashboard': (dashboard, page_loaded, True, 2),
+    'upload_pdf': (upload_pdf, upload_accepted, True, 1),
+}
+
+
+def prime_upload_cache(targets, make_session):
+    # Upload each sample once and let its extraction job finish, so the measured uploads
+    # all take the cached path instead of tripping the per-user extraction job limit
+    session = make_session()
+    session.request('POST', '/login', {'email': targets['forms'][0]['owner'], 'password': PASSWORD})
+    deadline = time.monotonic() + PRIME_TIMEOUT_SECONDS
+    for pdf in targets['pdfs']:
+        session.request('POST', '/upload_pdf', None, {'pdf': pdf})
+        while True:
+            with app.app_context():
+                active = db.session.scalar(db.select(db.func.count(ExtractionJob.id))
+                                           .where(ExtractionJob.status.in_(JOB_ACTIVE_STATUSES)))
+            if not active:
+                break
+            if time.monotonic() > deadline:
+                raise SystemExit('PDF extraction jobs did not finish while priming the upload scenario')
+            time.sleep(0.1)
+
+
+def split_evenly(total, parts):
+    # The first total % parts workers take one extra, so the shares add up to total
+    return [total // parts + (index < total % parts) for index in range(parts)]
+
+
+def run_scenario(name, targets, make_session, iterations, warmup, concurrency=None):
+    next_request, succeeded, needs_login, default_concurrency = SCENARIOS[name]
+    concurrency = max(min(concurrency or default_concurrency, iterations), 1)
+    if name == 'upload_pdf':
+        if not targets['pdfs']:
+            return None
+        prime_upload_cache(targets, make_session)
+    latencies, errors, lock = [], [0], threading.Lock()
+    per_worker = split_evenly(iterations, concurrency)
+    per_worker_warmup = split_evenly(warmup, concurrency)
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index):
+        rng = random.Random(f'{name}-{index}')
+        session = make_session()
+        if needs_login:
+            session.request('POST', '/login', {'email': targets['forms'][0]['owner'], 'password': PASSWORD})
+        for _ in range(per_worker_warmup[index]):
+            status, location = session.request(*next_request(rng, targets))
+            succeeded(session, status, location)
+        barrier.wait()
+        local, failed = [], 0
+        for _ in range(per_worker[index]):
+            method, path, data, files = next_request(rng, targets)
+            start = time.perf_counter()
+            status, location = session.request(method, path, data, files)
+            local.append(time.perf_counter() - start)
+            failed += not succeeded(session, status, location)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()  # every worker is logged in and warmed up
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return {'latencies': latencies, 'errors': errors[0], 'wall_seconds': time.perf_counter() - start,
+            'concurrency': concurrency}
+
+
+def session_factory(base_url=None):
+    if base_url:
+        return lambda: HTTPSession(base_url)
+    return TestClientSession
@@ -0,0 +1,101 @@
+"""Summarise scenario runs and compare two result files.
+
+Latency percentiles use the nearest-rank method on the measured requests
+only. A result file records the dataset, git revision and settings, so a
+comparison can warn when two runs did not measure the same thing.
+"""
+import json
+import math
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+COMPARED_METRICS = [
+    # name, higher is better
+    ('p50_ms', False),
+    ('p95_ms', False),
+    ('p99_ms', False),
+    ('throughput_rps', True),
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarise(run):
+    latencies = sorted(run['latencies'])
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': run['errors'],
+        'concurrency': run['concurrency'],
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        'max_ms': round(latencies[-1] * 1000, 3) if count else 0.0,
+        'throughput_rps': round(count / run['wall_seconds'], 2) if run['wall_seconds'] else 0.0,
+    }
+
+
+def git_revision(repo_root):
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=repo_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(scenarios, dataset, settings, repo_root):
+    return {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'git': git_revision(repo_root),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'dataset': dataset,
+            'settings': settings,
+        },
+        'scenarios': scenarios,
+    }
+
+
+def print_summary(report, out=print):
+    out(f"{'scenario':<16} {'requests':>8} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    for name, row in report['scenarios'].items():
+        out(f"{name:<16} {row['requests']:>8} {row['errors']:>6} {row['p50_ms']:>9.2f} "
+            f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['throughput_rps']:>9.1f}")
+
+
+def compare(baseline_path, candidate_path, threshold, out=print):
+    # Returns the number of metrics that got worse by more than threshold (a fraction)
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+    for key in ('dataset', 'settings'):
+        if baseline['meta'][key] != candidate['meta'][key]:
+            out(f'warning: the runs used different {key}; the comparison may not be meaningful')
+
+    regressions = 0
+    out(f"{'scenario':<16} {'metric':<15} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for name, before in baseline['scenarios'].items():
+        after = candidate['scenarios'].get(name)
+        if after is None:
+            out(f'{name:<16} missing from {candidate_path}')
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = before[metric], after[metric]
+            change = (new - old) / old if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            out(f'{name:<16} {metric:<15} {old:>10.2f} {new:>10.2f} {change:>+8.1%}{flag}')
+    return regressions
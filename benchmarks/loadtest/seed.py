@@ -0,0 +1,136 @@
+"""Bulk-generate users, companies, forms and responses for load tests.
+
+Everything is derived from a single random seed, so two databases seeded
+with the same arguments hold the same rows. Responses and answers are
+written with multi-row INSERTs in chunks, and the answer tallies, response
+rollups and search index are computed while generating, so the seeded
+database looks exactly like one filled through submit_form, typed answer
+columns included.
+"""
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app import (db, User, Company, Form, Question, Response, Answer,
+                 CHOICE_QUESTION_TYPES, bump_tallies, bump_rollups, encode_answer, option_positions,
+                 index_responses, rollup_bucket, hourly_rollup_cutoff)
+
+PASSWORD = 'loadtest'
+CHUNK_SIZE = 20000
+QUESTION_MIX = ['text', 'email', 'number', 'radio', 'checkbox', 'multiple_choice', 'date', 'tel']
+CHOICES = ['Red', 'Green', 'Blue', 'Yellow', 'Other']
+CHOICE_POSITIONS = option_positions(CHOICES)
+DAYS_OF_HISTORY = 90
+
+
+def user_email(index):
+    return f'loadtest{index}@example.com'
+
+
+def answer_for(rng, question_type, response_id):
+    # The submitted values for one question, as a browser would post them
+    if question_type in ('radio', 'multiple_choice'):
+        return [rng.choice(CHOICES)]
+    if question_type == 'checkbox':
+        return sorted(rng.sample(CHOICES, rng.randint(1, 3)), key=CHOICES.index)
+    if question_type == 'email':
+        return [f'respondent{response_id}@example.com']
+    if question_type == 'number':
+        return [str(rng.randint(0, 1000))]
+    if question_type == 'tel':
+        return [f'+1555{rng.randint(0, 9999999):07d}']
+    if question_type == 'date':
+        return [f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}']
+    return [f'Answer {response_id} ' + ' '.join(rng.choices(CHOICES, k=rng.randint(1, 8))).lower()]
+
+
+def seed(users=10, companies=20, forms_per_user=5, questions_per_form=8, responses=100000,
+         answer_rate=0.9, random_seed=0, echo=print):
+    rng = random.Random(random_seed)
+    db.drop_all()
+    db.create_all()
+
+    # All accounts share one password hash; hashing is deliberately slow
+    template = User(email='template')
+    template.set_password(PASSWORD)
+    db.session.execute(db.insert(User), [
+        {'id': i, 'email': user_email(i), 'password_hash': template.password_hash}
+        for i in range(1, users + 1)
+    ])
+    db.session.execute(db.insert(Company), [
+        {'id': i, 'name': f'Company {i}', 'referral_code': f'LOAD{i:04d}'}
+        for i in range(1, companies + 1)
+    ])
+
+    now = datetime.utcnow().replace(microsecond=0)
+    form_rows, question_rows, questions_by_form = [], [], {}
+    question_id = 0
+    for form_id in range(1, users * forms_per_user + 1):
+        form_rows.append({
+            'id': form_id, 'title': f'Load test form {form_id}', 'description': 'Synthetic data',
+            'user_id': (form_id - 1) // forms_per_user + 1,
+            'company_id': rng.randint(1, companies) if companies and rng.random() < 0.3 else None,
+            'created_at': now - timedelta(days=rng.randint(0, DAYS_OF_HISTORY)), 'version': 1,
+        })
+        questions_by_form[form_id] = []
+        for order in range(questions_per_form):
+            question_id += 1
+            question_type = QUESTION_MIX[(form_id + order) % len(QUESTION_MIX)]
+            question_rows.append({
+                'id': question_id, 'form_id': form_id, 'question_text': f'Question {order + 1}',
+                'question_type': question_type, 'order': order, 'required': False,
+                'options': None,
+            })
+            questions_by_form[form_id].append((question_id, question_type))
+    db.session.execute(db.insert(Form), form_rows)
+    db.session.execute(db.insert(Question), question_rows)
+    db.session.commit()
+    # Options go through the model so the option rows are created too
+    for question in Question.query.filter(Question.question_type.in_(CHOICE_QUESTION_TYPES)):
+        question.set_options(CHOICES)
+    db.session.commit()
+    echo(f'{users} users, {companies} companies, {len(form_rows)} forms, {len(question_rows)} questions')
+
+    # Traffic is skewed: a few forms receive most of the responses
+    form_ids = list(questions_by_form)
+    weights = [1.0 / rank for rank in range(1, len(form_ids) + 1)]
+    hourly_since = hourly_rollup_cutoff()
+    written = 0
+    while written < responses:
+        count = min(CHUNK_SIZE, responses - written)
+        response_rows, answer_rows, search_rows = [], [], []
+        tallies, rollups = Counter(), Counter()
+        for response_id in range(written + 1, written + count + 1):
+            form_id = rng.choices(form_ids, weights)[0]
+            company_id = rng.randint(1, companies) if companies and rng.random() < 0.5 else None
+            submitted_at = now - timedelta(seconds=rng.randint(0, DAYS_OF_HISTORY * 86400))
+            response_rows.append({'id': response_id, 'form_id': form_id,
+                                  'company_id': company_id, 'submitted_at': submitted_at})
+            rollups[(form_id, company_id or 0, 'day', rollup_bucket(submitted_at, 'day'))] += 1
+            if submitted_at >= hourly_since:
+                rollups[(form_id, company_id or 0, 'hour', rollup_bucket(submitted_at, 'hour'))] += 1
+            texts = []
+            for question_id, question_type in questions_by_form[form_id]:
+                if rng.random() > answer_rate:
+                    continue
+                values = answer_for(rng, question_type, response_id)
+                answer_rows.append({'response_id': response_id, 'question_id': question_id,
+                                    **encode_answer(question_type, CHOICE_POSITIONS, values)})
+                texts.append(', '.join(values))
+                if question_type in CHOICE_QUESTION_TYPES:
+                    for option in values:
+                        tallies[(form_id, question_id, company_id or 0, option)] += 1
+            search_rows.append((response_id, form_id, company_id, '\n'.join(texts)))
+        db.session.execute(db.insert(Response), response_rows)
+        db.session.execute(db.insert(Answer), answer_rows)
+        bump_tallies(tallies)
+        bump_rollups(rollups)
+        index_responses(search_rows)
+        db.session.commit()
+        written += count
+        echo(f'  {written}/{responses} responses')
+    return {
+        'users': users, 'companies': companies, 'forms_per_user': forms_per_user,
+        'questions_per_form': questions_per_form, 'responses': responses,
+        'answer_rate': answer_rate, 'seed': random_seed,
+    }
@@ -0,0 +1,32 @@
+"""Add indexes backing the dashboard query
+
+Revision ID: 0b9c5e7a3f12
+Revises: f1b7d24e8a90
+Create Date: 2026-10-18 16:03:48.220974
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b9c5e7a3f12'
+down_revision = 'f1b7d24e8a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('form', schema=None) as batch_op:
+        batch_op.create_index('ix_form_user_created', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.create_index('ix_question_form_order', ['form_id', 'order'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_index('ix_question_form_order')
+
+    with op.batch_alter_table('form', schema=None) as batch_op:
+        batch_op.drop_index('ix_form_user_created')
@@ -0,0 +1,26 @@
+"""Add composite index for keyset pagination of responses
+
+Revision ID: 3c1f7a9d2b64
+Revises: 79db543bc984
+Create Date: 2026-10-18 09:12:44.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f7a9d2b64'
+down_revision = '79db543bc984'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('response', schema=None) as batch_op:
+        batch_op.create_index('ix_response_form_submitted', ['form_id', 'submitted_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('response', schema=None) as batch_op:
+        batch_op.drop_index('ix_response_form_submitted')
@@ -0,0 +1,31 @@
+"""Allow extraction jobs whose upload was discarded
+
+Revision ID: 4b8d0e6f2a17
+Revises: e6a1c93f0b52
+Create Date: 2026-10-18 21:05:43.118206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8d0e6f2a17'
+down_revision = 'e6a1c93f0b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('extraction_job', schema=None) as batch_op:
+        batch_op.alter_column('pdf_upload_id',
+               existing_type=sa.Integer(),
+               nullable=True)
+
+
+def downgrade():
+    op.execute('DELETE FROM extraction_job WHERE pdf_upload_id IS NULL')
+    with op.batch_alter_table('extraction_job', schema=None) as batch_op:
+        batch_op.alter_column('pdf_upload_id',
+               existing_type=sa.Integer(),
+               nullable=False)
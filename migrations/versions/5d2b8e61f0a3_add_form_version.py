@@ -0,0 +1,26 @@
+"""Add version stamp to Form
+
+Revision ID: 5d2b8e61f0a3
+Revises: a81e4c02d5f7
+Create Date: 2026-10-18 11:26:53.117840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2b8e61f0a3'
+down_revision = 'a81e4c02d5f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('form', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('form', schema=None) as batch_op:
+        batch_op.drop_column('version')
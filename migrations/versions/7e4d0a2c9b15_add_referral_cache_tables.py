@@ -0,0 +1,38 @@
+"""Add cache_version and referral_click tables
+
+Revision ID: 7e4d0a2c9b15
+Revises: 0b9c5e7a3f12
+Create Date: 2026-10-18 16:41:09.537712
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e4d0a2c9b15'
+down_revision = '0b9c5e7a3f12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_version',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('referral_click',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_id', 'day', name='uq_referral_click_day')
+    )
+
+
+def downgrade():
+    op.drop_table('referral_click')
+    op.drop_table('cache_version')
@@ -0,0 +1,34 @@
+"""Add response_rollup table
+
+Revision ID: 9a3c6f1e2d47
+Revises: 7e4d0a2c9b15
+Create Date: 2026-10-18 17:20:44.118205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3c6f1e2d47'
+down_revision = '7e4d0a2c9b15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('response_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('form_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['form_id'], ['form.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('form_id', 'granularity', 'bucket', 'company_id', name='uq_response_rollup')
+    )
+
+
+def downgrade():
+    op.drop_table('response_rollup')
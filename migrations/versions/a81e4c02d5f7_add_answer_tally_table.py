@@ -0,0 +1,40 @@
+"""Add answer_tally table
+
+Revision ID: a81e4c02d5f7
+Revises: 3c1f7a9d2b64
+Create Date: 2026-10-18 10:02:17.904512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a81e4c02d5f7'
+down_revision = '3c1f7a9d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('answer_tally',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('form_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=False),
+    sa.Column('option', sa.String(length=500), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['form_id'], ['form.id'], ),
+    sa.ForeignKeyConstraint(['question_id'], ['question.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('question_id', 'company_id', 'option', name='uq_answer_tally')
+    )
+    with op.batch_alter_table('answer_tally', schema=None) as batch_op:
+        batch_op.create_index('ix_answer_tally_form', ['form_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('answer_tally', schema=None) as batch_op:
+        batch_op.drop_index('ix_answer_tally_form')
+
+    op.drop_table('answer_tally')
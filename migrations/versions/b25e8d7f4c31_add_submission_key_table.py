@@ -0,0 +1,34 @@
+"""Add submission_key table
+
+Revision ID: b25e8d7f4c31
+Revises: 9a3c6f1e2d47
+Create Date: 2026-10-18 18:05:31.640127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b25e8d7f4c31'
+down_revision = '9a3c6f1e2d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('submission_key',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('form_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('response_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['form_id'], ['form.id'], ),
+    sa.ForeignKeyConstraint(['response_id'], ['response.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('form_id', 'key', name='uq_submission_key')
+    )
+
+
+def downgrade():
+    op.drop_table('submission_key')
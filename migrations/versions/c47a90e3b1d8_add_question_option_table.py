@@ -0,0 +1,48 @@
+"""Add question_option table
+
+Revision ID: c47a90e3b1d8
+Revises: 5d2b8e61f0a3
+Create Date: 2026-10-18 12:08:31.662095
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47a90e3b1d8'
+down_revision = '5d2b8e61f0a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    question_option = op.create_table('question_option',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('label', sa.String(length=500), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['question.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('question_id', 'position', name='uq_question_option_position')
+    )
+
+    # Backfill from the JSON options column
+    connection = op.get_bind()
+    rows = []
+    for question_id, options in connection.execute(sa.text('SELECT id, options FROM question WHERE options IS NOT NULL')):
+        try:
+            labels = json.loads(options)
+        except ValueError:
+            continue
+        if isinstance(labels, list):
+            rows.extend({'question_id': question_id, 'position': i, 'label': str(label)}
+                        for i, label in enumerate(labels))
+    if rows:
+        op.bulk_insert(question_option, rows)
+
+
+def downgrade():
+    op.drop_table('question_option')
@@ -0,0 +1,145 @@
+"""Add typed answer columns and backfill them
+
+Revision ID: d83f5b2a6e19
+Revises: b25e8d7f4c31
+Create Date: 2026-10-18 18:52:07.314590
+
+"""
+import json
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd83f5b2a6e19'
+down_revision = 'b25e8d7f4c31'
+branch_labels = None
+depends_on = None
+
+CHOICE_TYPES = ('multiple_choice', 'radio')
+NUMERIC_TYPES = ('scale', 'number', 'range')
+MASK_BITS = 63
+BATCH_SIZE = 1000
+
+answer = sa.table('answer',
+    sa.column('id', sa.Integer),
+    sa.column('question_id', sa.Integer),
+    sa.column('answer_text', sa.Text),
+    sa.column('option_index', sa.SmallInteger),
+    sa.column('option_mask', sa.BigInteger),
+    sa.column('numeric_value', sa.Float),
+)
+
+
+def labels_of(options):
+    try:
+        labels = json.loads(options) if options else []
+    except ValueError:
+        return []
+    return [str(label) for label in labels] if isinstance(labels, list) else []
+
+
+def format_numeric(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def split_checkbox(text, positions):
+    # Checkbox answers were joined with ', ', which labels may contain too;
+    # match whole labels from the left, backtracking on ambiguity
+    if text in positions:
+        return [text]
+    for label in sorted(positions, key=len, reverse=True):
+        if text.startswith(label + ', '):
+            rest = split_checkbox(text[len(label) + 2:], positions)
+            if rest is not None:
+                return [label] + rest
+    return None
+
+
+def encode(question_type, positions, text):
+    if question_type == 'checkbox':
+        labels = split_checkbox(text, positions)
+        if labels and len(set(labels)) == len(labels) and max(positions[label] for label in labels) < MASK_BITS:
+            return {'option_mask': sum(1 << positions[label] for label in labels)}
+    elif question_type in CHOICE_TYPES:
+        if text in positions:
+            return {'option_index': positions[text]}
+    elif re.fullmatch(r'-?\d+(\.\d+)?', text) and format_numeric(float(text)) == text:
+        return {'numeric_value': float(text)}
+    return None
+
+
+def upgrade():
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('option_index', sa.SmallInteger(), nullable=True))
+        batch_op.add_column(sa.Column('option_mask', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('numeric_value', sa.Float(), nullable=True))
+        batch_op.alter_column('answer_text', existing_type=sa.Text(), nullable=True)
+
+    connection = op.get_bind()
+    questions = connection.execute(sa.text(
+        "SELECT id, question_type, options FROM question "
+        "WHERE question_type IN ('multiple_choice', 'radio', 'checkbox', 'scale', 'number', 'range')"
+    )).all()
+    update = (answer.update().where(answer.c.id == sa.bindparam('answer_id'))
+              .values(answer_text=None, option_index=sa.bindparam('new_index'),
+                      option_mask=sa.bindparam('new_mask'), numeric_value=sa.bindparam('new_numeric')))
+    for question_id, question_type, options in questions:
+        positions = {}
+        for index, label in enumerate(labels_of(options)):
+            positions.setdefault(label, index)
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                sa.select(answer.c.id, answer.c.answer_text)
+                .where(answer.c.question_id == question_id, answer.c.id > last_id)
+                .order_by(answer.c.id).limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            changed = []
+            for answer_id, text in rows:
+                typed = encode(question_type, positions, text) if text else None
+                if typed:
+                    changed.append({'answer_id': answer_id, 'new_index': typed.get('option_index'),
+                                    'new_mask': typed.get('option_mask'), 'new_numeric': typed.get('numeric_value')})
+            if changed:
+                connection.execute(update, changed)
+
+
+def downgrade():
+    connection = op.get_bind()
+    questions = connection.execute(sa.text(
+        'SELECT DISTINCT question.id, question.options FROM question '
+        'JOIN answer ON answer.question_id = question.id WHERE answer.answer_text IS NULL'
+    )).all()
+    update = (answer.update().where(answer.c.id == sa.bindparam('answer_id'))
+              .values(answer_text=sa.bindparam('text')))
+    for question_id, options in questions:
+        labels = labels_of(options)
+        rows = connection.execute(
+            sa.select(answer.c.id, answer.c.option_index, answer.c.option_mask, answer.c.numeric_value)
+            .where(answer.c.question_id == question_id, answer.c.answer_text.is_(None))
+        ).all()
+        changed = []
+        for answer_id, option_index, option_mask, numeric_value in rows:
+            if option_index is not None:
+                text = labels[option_index] if option_index < len(labels) else ''
+            elif option_mask is not None:
+                text = ', '.join(label for i, label in enumerate(labels[:MASK_BITS]) if option_mask >> i & 1)
+            elif numeric_value is not None:
+                text = format_numeric(numeric_value)
+            else:
+                text = ''
+            changed.append({'answer_id': answer_id, 'text': text})
+        if changed:
+            connection.execute(update, changed)
+
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.alter_column('answer_text', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('numeric_value')
+        batch_op.drop_column('option_mask')
+        batch_op.drop_column('option_index')
@@ -0,0 +1,33 @@
+"""Add response_search full-text index
+
+Revision ID: e6a1c93f0b52
+Revises: d83f5b2a6e19
+Create Date: 2026-10-18 19:41:26.508317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a1c93f0b52'
+down_revision = 'd83f5b2a6e19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases search with a LIKE scan instead.
+    # Existing responses are indexed by `flask rebuild-search`.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS response_search USING fts5("
+        "body, form_id UNINDEXED, company_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute('DROP TABLE IF EXISTS response_search')
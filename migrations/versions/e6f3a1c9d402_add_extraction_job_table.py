@@ -0,0 +1,44 @@
+"""Add extraction_job table
+
+Revision ID: e6f3a1c9d402
+Revises: c47a90e3b1d8
+Create Date: 2026-10-18 13:41:05.280337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f3a1c9d402'
+down_revision = 'c47a90e3b1d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('extraction_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('pdf_upload_id', sa.Integer(), nullable=False),
+    sa.Column('company_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('form_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['company_id'], ['company.id'], ),
+    sa.ForeignKeyConstraint(['form_id'], ['form.id'], ),
+    sa.ForeignKeyConstraint(['pdf_upload_id'], ['pdf_upload.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('extraction_job', schema=None) as batch_op:
+        batch_op.create_index('ix_extraction_job_user_status', ['user_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('extraction_job', schema=None) as batch_op:
+        batch_op.drop_index('ix_extraction_job_user_status')
+
+    op.drop_table('extraction_job')
@@ -0,0 +1,41 @@
+"""Add content-addressed pdf_blob table
+
+Revision ID: f1b7d24e8a90
+Revises: e6f3a1c9d402
+Create Date: 2026-10-18 14:37:22.845166
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b7d24e8a90'
+down_revision = 'e6f3a1c9d402'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pdf_blob',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('extracted_questions', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    with op.batch_alter_table('pdf_upload', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_pdf_upload_blob', 'pdf_blob', ['blob_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('pdf_upload', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_pdf_upload_blob', type_='foreignkey')
+        batch_op.drop_column('blob_id')
+
+    op.drop_table('pdf_blob')